@@ -15,10 +15,28 @@ from freecurrencyapi import Client
 from dotenv import load_dotenv
 import os
 
+from rate_cache import RateCache
+
 load_dotenv()
 
 API_KEY = os.getenv("API_KEY")
 
+# One API client and one rate cache shared by every session, so concurrent
+# conversions from the same base make a single API call
+api = Client(API_KEY) if API_KEY else None
+
+
+# Function to fetch the full rate table of a base currency
+def fetch_rates(base_currency):
+    response = api.latest(base_currency=base_currency)  # Call latest rates
+    if "data" not in response:
+        raise ValueError("Failed to fetch latest rates.")
+    return response["data"]
+
+
+# Rate tables are reused until they expire, so repeated conversions cost no quota
+rate_cache = RateCache(fetch_rates)
+
 def main(page: Page):
     page.title = "Currency Converter"
     page.vertical_alignment = "center"
@@ -40,9 +58,7 @@ def main(page: Page):
     error_message = Text(color="red")
     progress = ProgressRing(visible=False)
 
-    if API_KEY:
-        api = Client(API_KEY)
-    else:
+    if not API_KEY:
         error_message.value = "No API key found!"
 
     # Function to fetch and populate currencies
@@ -97,13 +113,9 @@ def main(page: Page):
             return
 
         try:
-            response = api.latest(base_currency=from_currency)  # Call latest rates
-            if "data" in response:
-                converted_amount = response["data"][to_currency]
-                total_amount = round(amount_float * converted_amount, 2)
-                convert_result.value = f"{amount_float} {from_currency} = {total_amount} {to_currency}"
-            else:
-                handle_error("Failed to fetch latest rates.")
+            converted_amount = rate_cache.rate(from_currency, to_currency)
+            total_amount = round(amount_float * converted_amount, 2)
+            convert_result.value = f"{amount_float} {from_currency} = {total_amount} {to_currency}"
         except Exception as ex:
             error_message.value = f"Conversion error: {ex}"
             update_results_visibility()
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+
+# File keeping the fetched rate tables between app restarts
+RATE_CACHE_FILE = os.getenv("RATE_CACHE_FILE", "rates_cache.json")
+# Seconds a rate table is used before it is fetched again
+RATE_TTL = float(os.getenv("RATE_TTL", 3600))
+
+
+class _PendingFetch:
+    """One upstream call in flight, shared by every caller asking for the same base."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.rates = None
+        self.error = None
+
+
+class RateCache:
+    """Exchange rate tables per base currency, fetched at most once per TTL.
+
+    fetch(base) returns the full {currency: rate} table of base and is
+    only called when the cached table is missing or older than ttl
+    seconds, so any conversion from the same base within the TTL costs no
+    API quota. Concurrent requests for the same base wait for a single
+    fetch. Tables are saved to path and loaded again on start.
+    """
+
+    def __init__(self, fetch, path=RATE_CACHE_FILE, ttl=RATE_TTL):
+        self.fetch = fetch
+        self.path = path
+        self.ttl = ttl
+        self._tables = {}  # base -> (fetched_at, rates)
+        self._pending = {}  # base -> _PendingFetch
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def rates(self, base):
+        """Returns the {currency: rate} table for base, fetching it only when needed."""
+        table = self._tables.get(base)
+        if table is not None and time.time() - table[0] < self.ttl:
+            return table[1]
+
+        with self._lock:
+            # Another caller may have refreshed it in the meantime
+            table = self._tables.get(base)
+            if table is not None and time.time() - table[0] < self.ttl:
+                return table[1]
+            pending = self._pending.get(base)
+            leader = pending is None
+            if leader:
+                pending = self._pending[base] = _PendingFetch()
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.rates
+
+        try:
+            pending.rates = self.fetch(base)
+            with self._lock:
+                self._tables[base] = (time.time(), pending.rates)
+        except Exception as ex:
+            pending.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._pending[base]
+            pending.done.set()
+        self._save()
+        return pending.rates
+
+    def rate(self, base, target):
+        """Returns how many target one unit of base buys."""
+        return self.rates(base)[target]
+
+    def fetched_at(self, base):
+        """Returns the time.time() the table of base was fetched, None when there is none."""
+        table = self._tables.get(base)
+        return table[0] if table else None
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                saved = json.load(file)
+            self._tables = {base: (table["fetched_at"], table["rates"]) for base, table in saved.items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            self._tables = {}  # No cache yet or an unreadable one: start empty
+
+    def _save(self):
+        with self._lock:
+            saved = {base: {"fetched_at": fetched_at, "rates": rates} for base, (fetched_at, rates) in self._tables.items()}
+        temporary = f"{self.path}.tmp"
+        with self._save_lock:
+            try:
+                with open(temporary, "w", encoding="utf-8") as file:
+                    json.dump(saved, file)
+                os.replace(temporary, self.path)  # Never leave a half written cache behind
+            except OSError:
+                pass  # The in-memory cache still works
@@ -0,0 +1,197 @@
+"""Benchmark harness for the organize pipeline, stage by stage.
+
+Generates synthetic flat folders on tmpfs (/dev/shm when available) with
+different extension mixes and name collision rates, organizes them
+without the UI, and reports for each stage (scan, classify, resolve
+conflicts, move):
+
+- files/s,
+- filesystem calls per file, counted at the Python os layer (audit
+  events plus os.stat/os.lstat and renameat2 calls; one call is about one syscall,
+  except that a scandir batch covers many entries). This needs no
+  strace or root;
+- the peak RSS reached during the stage (reset per stage on Linux).
+
+Usage:
+    python benchmark.py                                      # 10k and 100k files
+    python benchmark.py --sizes 1000000 --mixes mixed --collisions 0.1
+    python benchmark.py --jsonl > results.jsonl
+"""
+import argparse
+import functools
+import itertools
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import transfer
+from file_organizer import RULES, create_folders, move_file, plan_destination, scan_directory
+from mover import MoveExecutor, MOVE_WORKERS
+from name_index import NameIndex
+
+SIZES = (10_000, 100_000)
+COLLISIONS = (0.0, 0.5)
+# Relative weights of the extensions in each synthetic tree
+MIXES = {
+    "documents": {".pdf": 4, ".docx": 2, ".txt": 2, ".xlsx": 1, ".jpg": 1},
+    "media": {".jpg": 3, ".png": 2, ".mp4": 2, ".mp3": 2, ".zip": 1},
+    "mixed": {".pdf": 1, ".jpg": 1, ".mp4": 1, ".mp3": 1, ".zip": 1, ".py": 1, ".exe": 1, ".tar.gz": 1, ".dat": 2},
+}
+STAGES = ("scan", "classify", "resolve", "move")
+
+
+class FsCallCounter:
+    """Counts filesystem calls made through the os module while active."""
+
+    _installed = None
+
+    def __init__(self):
+        self._calls = itertools.count()
+        self.active = False
+        if FsCallCounter._installed is None:
+            # Audit hooks cannot be removed again, so one hook serves every counter
+            sys.addaudithook(lambda event, args: FsCallCounter._installed._audit(event))
+        FsCallCounter._installed = self
+
+    def _audit(self, event):
+        if self.active and (event == "open" or event.startswith(("os.", "shutil."))):
+            next(self._calls)
+
+    def counting(self, function):
+        @functools.wraps(function)
+        def counted(*args, **kwargs):
+            if self.active:
+                next(self._calls)
+            return function(*args, **kwargs)
+        return counted
+
+    def __enter__(self):
+        # stat calls, and renameat2 called through ctypes, raise no audit event
+        self._stat, self._lstat, self._renameat2 = os.stat, os.lstat, transfer._renameat2
+        os.stat, os.lstat = self.counting(os.stat), self.counting(os.lstat)
+        if transfer._renameat2 is not None:
+            transfer._renameat2 = self.counting(transfer._renameat2)
+        self._calls = itertools.count()
+        self.active = True
+        return self
+
+    def __exit__(self, *exc_info):
+        self.active = False
+        os.stat, os.lstat, transfer._renameat2 = self._stat, self._lstat, self._renameat2
+
+    @property
+    def calls(self):
+        # Reading an itertools.count means advancing it, so undo that step
+        value = next(self._calls)
+        self._calls = itertools.count(value)
+        return value
+
+
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass  # Not Linux: the peak then is the process-wide one
+
+
+def peak_rss():
+    """Peak resident set size in bytes."""
+    try:
+        with open("/proc/self/status") as file:
+            return int(re.search(r"VmHWM:\s+(\d+)", file.read()).group(1)) * 1024
+    except (OSError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def make_tree(root, files, mix, collision_rate, seed=42):
+    """A flat folder of `files` empty files; collision_rate of them already exist in their category folder."""
+    rng = random.Random(seed)
+    extensions = rng.choices(list(MIXES[mix]), weights=list(MIXES[mix].values()), k=files)
+    os.makedirs(root)
+    for i, extension in enumerate(extensions):
+        name = f"file_{i:07d}{extension}"
+        open(os.path.join(root, name), "wb").close()
+        if rng.random() < collision_rate:
+            folder = os.path.join(root, RULES.classify(name))
+            os.makedirs(folder, exist_ok=True)
+            open(os.path.join(folder, name), "wb").close()
+
+
+def run_stages(root):
+    """Runs the pipeline on root stage by stage; yields (stage, seconds, fs calls, peak RSS)."""
+    counter = FsCallCounter()
+    state = {}
+
+    def scan():
+        state["entries"] = scan_directory(root)
+
+    def classify():
+        groups = {}
+        for entry in state["entries"]:
+            # DirEntry.stat is a real stat call the first time but raises no audit event
+            stat = counter.counting(entry.stat) if RULES.needs_stat else entry.stat
+            groups.setdefault(RULES.classify(entry.name, stat), []).append(entry)
+        state["groups"] = groups
+
+    def resolve():
+        state["names"] = NameIndex()
+        state["moves"] = [
+            move for category, entries in state["groups"].items()
+            for move in plan_destination(root, category, entries, state["names"])
+        ]
+
+    def move():
+        create_folders(state["moves"])
+        mover = functools.partial(move_file, names=state["names"])
+        with MoveExecutor(workers=MOVE_WORKERS, move=mover, log_moves=False) as executor:
+            for source, destination in state["moves"]:
+                executor.submit(source, destination)
+
+    for stage, func in zip(STAGES, (scan, classify, resolve, move)):
+        reset_peak_rss()
+        with counter:
+            start = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - start
+        yield stage, seconds, counter.calls, peak_rss()
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--mixes", nargs="+", choices=list(MIXES), default=list(MIXES))
+    parser.add_argument("--collisions", type=float, nargs="+", default=COLLISIONS, help="share of names already taken")
+    parser.add_argument("--base", default="/dev/shm" if os.path.isdir("/dev/shm") else None, help="where to build the trees")
+    parser.add_argument("--jsonl", action="store_true", help="print JSON lines instead of a table")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(dir=args.base)
+    try:
+        for size, mix, collision_rate in itertools.product(args.sizes, args.mixes, args.collisions):
+            root = os.path.join(base, f"{mix}_{size}_{collision_rate}")
+            make_tree(root, size, mix, collision_rate)
+            for stage, seconds, calls, rss in run_stages(root):
+                result = {"files": size, "mix": mix, "collisions": collision_rate, "stage": stage,
+                          "seconds": round(seconds, 4), "files_per_second": round(size / seconds),
+                          "fs_calls_per_file": round(calls / size, 4), "peak_rss_mb": round(rss / 2 ** 20, 1)}
+                if args.jsonl:
+                    print(json.dumps(result), flush=True)
+                else:
+                    print(f"{size:>9,} {mix:<10} {collision_rate:>4.0%} {stage:<9} {seconds:>8.3f}s "
+                          f"{result['files_per_second']:>11,} files/s {result['fs_calls_per_file']:>7} calls/file "
+                          f"{result['peak_rss_mb']:>8} MiB", flush=True)
+            shutil.rmtree(root)
+    finally:
+        shutil.rmtree(base)
+
+
+if __name__ == "__main__":
+    main_cli()
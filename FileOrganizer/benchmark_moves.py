@@ -0,0 +1,81 @@
+"""Benchmark of the move executor: sequential moves against a thread pool.
+
+Builds a synthetic flat folder on tmpfs (/dev/shm when available) and
+organizes it with 1 and with several move workers. The "slow I/O" tree
+adds a fixed delay to every move to simulate the latency of an SMB/NFS
+share, where the pool pays off most. Files are moved the way a real run
+moves them: move_file() (transfer and no-overwrite naming) with per-move
+logging off.
+
+Usage: python benchmark_moves.py [--files 20000] [--workers 1 4 8 16] [--latency-ms 2]
+"""
+import argparse
+import functools
+import os
+import shutil
+import tempfile
+import time
+
+from file_organizer import FILE_TYPE_MAPPING, create_folders, move_file, plan_moves, scan_directory
+from mover import MoveExecutor
+from name_index import NameIndex
+
+EXTENSIONS = [extension for extensions in FILE_TYPE_MAPPING.values() for extension in extensions] + ['.bin']
+
+
+def make_tree(root, files):
+    os.makedirs(root)
+    for i in range(files):
+        with open(os.path.join(root, f"file_{i}{EXTENSIONS[i % len(EXTENSIONS)]}"), "wb") as file:
+            file.write(b"x" * 64)
+
+
+def slow_move(move, latency):
+    def delayed(source, destination):
+        time.sleep(latency)
+        return move(source, destination)
+    return delayed
+
+
+def run(base, files, workers, latency):
+    root = os.path.join(base, f"tree_{workers}_{latency}")
+    make_tree(root, files)
+    try:
+        start = time.perf_counter()
+        names = NameIndex()
+        moves = plan_moves(root, scan_directory(root), names=names)
+        create_folders(moves)
+        move = functools.partial(move_file, names=names)
+        if latency:
+            move = slow_move(move, latency)
+        with MoveExecutor(workers=workers, move=move, log_moves=False) as executor:
+            for source, destination in moves:
+                executor.submit(source, destination)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(root)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated delay per move on the slow tree")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    try:
+        for label, files, latency in (("tmpfs", args.files, 0),
+                                      ("slow I/O", args.files // 10, args.latency_ms / 1000)):
+            sequential = None
+            for workers in args.workers:
+                seconds = run(base, files, workers, latency)
+                sequential = sequential or seconds
+                print(f"{label:<9} {files:>8,} files {workers:>3} workers {seconds:>8.3f}s "
+                      f"{files / seconds:>10,.0f} files/s  x{sequential / seconds:.1f}", flush=True)
+    finally:
+        shutil.rmtree(base)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,79 @@
+"""Benchmark of transfer() against shutil.move.
+
+Moves the same synthetic files with both, once within one filesystem and
+once across devices (from tmpfs, /dev/shm, to the disk folder given with
+--dest), and prints MB/s. Cross-device moves are where the kernel copy
+paths of transfer() pay off.
+
+Usage: python benchmark_transfer.py [--dest .] [--large 8] [--large-mb 64] [--small 2000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from transfer import copy_file, transfer
+
+
+def make_files(folder, count, size):
+    os.makedirs(folder)
+    block = os.urandom(min(size, 1024 * 1024))
+    for i in range(count):
+        with open(os.path.join(folder, f"file_{i}.bin"), "wb") as file:
+            for _ in range(size // len(block)):
+                file.write(block)
+            file.write(block[:size % len(block)])
+    return [os.path.join(folder, f"file_{i}.bin") for i in range(count)]
+
+
+def run(move, source_base, destination_base, count, size):
+    """Returns the seconds move() needs for `count` files of `size` bytes."""
+    source_folder = tempfile.mkdtemp(dir=source_base)
+    destination_folder = tempfile.mkdtemp(dir=destination_base)
+    try:
+        sources = make_files(os.path.join(source_folder, "in"), count, size)
+        start = time.perf_counter()
+        for source in sources:
+            move(source, os.path.join(destination_folder, os.path.basename(source)))
+        if hasattr(os, "sync"):
+            os.sync()  # Count writing the data out, not just filling the page cache
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(source_folder)
+        shutil.rmtree(destination_folder)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dest", default=".", help="folder on another device than /dev/shm")
+    parser.add_argument("--large", type=int, default=8, help="number of large files")
+    parser.add_argument("--large-mb", type=int, default=64, help="size of a large file in MiB")
+    parser.add_argument("--small", type=int, default=2000, help="number of 64 KiB files")
+    args = parser.parse_args()
+
+    shm = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    cross_device = os.stat(shm).st_dev != os.stat(args.dest).st_dev
+    setups = [("same filesystem", args.dest, args.dest)]
+    if cross_device:
+        setups.append(("cross-device", shm, args.dest))
+    else:
+        print(f"{shm} and {args.dest} are on the same device, skipping the cross-device run")
+
+    probe = make_files(tempfile.mkdtemp(dir=shm) + "/probe", 1, 4096)[0]
+    probe_copy = os.path.join(tempfile.mkdtemp(dir=args.dest), "probe")
+    print(f"copy method across devices: {copy_file(probe, probe_copy)[0]}")
+    shutil.rmtree(os.path.dirname(os.path.dirname(probe)))
+    shutil.rmtree(os.path.dirname(probe_copy))
+
+    for label, source_base, destination_base in setups:
+        for count, size in ((args.large, args.large_mb * 1024 * 1024), (args.small, 64 * 1024)):
+            megabytes = count * size / (1024 * 1024)
+            for name, move in (("shutil.move", shutil.move), ("transfer", transfer)):
+                seconds = run(move, source_base, destination_base, count, size)
+                print(f"{label:<16} {count:>6} x {size // 1024:>7} KiB  {name:<12} {seconds:>8.3f}s "
+                      f"{megabytes / seconds:>10.1f} MB/s", flush=True)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,135 @@
+"""Headless command line for the File Organizer.
+
+Prints one JSON object per line on stdout, so runs can be scripted and
+parsed on servers without the Flet UI:
+
+    {"event": "plan", "source": ..., "destination": ...}   (--dry-run)
+    {"event": "progress", "percent": 42.0}                 (at most once a second)
+    {"event": "batch", "moved": 3}                         (watch)
+    {"event": "done", "moved": ..., "seconds": ..., "files_per_second": ...}
+    {"event": "done", ..., "missing": ...}                  (undo: files deleted since the run, skipped)
+    {"event": "done", "planned": ..., "seconds": ...}      (--dry-run: files that would move)
+    {"event": "error", "message": ...}
+
+Usage:
+    python cli.py organize FOLDER [--dry-run] [--recursive] [--duplicates skip|hardlink|quarantine]
+    python cli.py undo FOLDER
+    python cli.py watch FOLDER [--poll]
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+
+import file_organizer
+from duplicates import DUPLICATE_ACTIONS
+from jobs import ProgressThrottle
+from mover import MOVE_WORKERS
+from scan_cache import ScanCache, SCAN_CACHE_FILE
+
+_output_lock = threading.Lock()
+
+
+def emit(event, **fields):
+    line = json.dumps({"event": event, **fields})
+    with _output_lock:
+        print(line, flush=True)
+
+
+def done(moved, start, **fields):
+    seconds = time.perf_counter() - start
+    emit("done", moved=moved, seconds=round(seconds, 3), files_per_second=round(moved / seconds, 1) if seconds else None,
+         **fields)
+
+
+def organize(args):
+    start = time.perf_counter()
+    cache = ScanCache(args.cache) if args.cache else None
+    try:
+        if args.dry_run:
+            def show_moves(moves):
+                for source, destination in moves:
+                    emit("plan", source=source, destination=destination)
+            planned = file_organizer.preview_organize(args.folder, show_moves, args.workers, args.recursive, cache)
+            emit("done", planned=planned, seconds=round(time.perf_counter() - start, 3))
+            return
+        progress = ProgressThrottle(lambda percent: emit("progress", percent=round(percent, 1)), interval=1.0)
+        moved = file_organizer.organize_files(
+            args.folder, progress_callback=progress, workers=args.workers, move_workers=args.move_workers,
+            duplicates=args.duplicates, recursive=args.recursive, cache=cache,
+        )
+        done(moved, start)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def undo(args):
+    start = time.perf_counter()
+    progress = ProgressThrottle(lambda percent: emit("progress", percent=round(percent, 1)), interval=1.0)
+    missing = []
+    moved = file_organizer.undo_last_run(args.folder, progress_callback=progress, move_workers=args.move_workers,
+                                         missing=missing)
+    done(moved, start, missing=len(missing))
+
+
+def watch(args):
+    start = time.perf_counter()
+    total = 0
+
+    def on_batch(moved):
+        nonlocal total
+        total += moved
+        emit("batch", moved=moved)
+
+    # Ctrl+C or a service manager's SIGTERM ends the watch
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    watcher = file_organizer.watch_folder(args.folder, on_batch=on_batch, duplicates=args.duplicates, poll=args.poll)
+    emit("watching", folder=watcher.target_directory)
+    while not stop.wait(1):
+        pass
+    watcher.stop()
+    done(total, start)
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    organize_parser = commands.add_parser("organize", help="organize a folder once")
+    organize_parser.add_argument("folder")
+    organize_parser.add_argument("--dry-run", action="store_true", help="only print the plan, move nothing")
+    organize_parser.add_argument("--recursive", action="store_true", help="include subfolders")
+    organize_parser.add_argument("--duplicates", choices=DUPLICATE_ACTIONS)
+    organize_parser.add_argument("--workers", type=int, default=file_organizer.PLAN_WORKERS, help="planning threads")
+    organize_parser.add_argument("--move-workers", type=int, default=MOVE_WORKERS, help="move threads")
+    organize_parser.add_argument("--cache", default=SCAN_CACHE_FILE, help="scan cache file ('' to disable)")
+    organize_parser.set_defaults(run=organize)
+
+    undo_parser = commands.add_parser("undo", help="move the files of the last run back")
+    undo_parser.add_argument("folder")
+    undo_parser.add_argument("--move-workers", type=int, default=MOVE_WORKERS, help="move threads")
+    undo_parser.set_defaults(run=undo)
+
+    watch_parser = commands.add_parser("watch", help="keep organizing new files until interrupted")
+    watch_parser.add_argument("folder")
+    watch_parser.add_argument("--duplicates", choices=DUPLICATE_ACTIONS)
+    watch_parser.add_argument("--poll", action="store_true", help="poll instead of using filesystem events")
+    watch_parser.set_defaults(run=watch)
+
+    args = parser.parse_args(argv)
+    try:
+        args.run(args)
+    except (OSError, ValueError) as e:
+        emit("error", message=str(e))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,180 @@
+import hashlib
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from scan_cache import list_folder, signature
+
+# What can be done with a file whose content is already there
+DUPLICATE_ACTIONS = ('skip', 'hardlink', 'quarantine')
+# Bytes read from the start and from the end of a file for the quick hash
+BLOCK_SIZE = 64 * 1024
+# Threads reading the quick hashes; that part is I/O bound
+PARTIAL_WORKERS = 8
+# Full hashes run in threads (blake2b releases the GIL) unless there are at
+# least this many files and bytes, which pays for starting a process pool
+PROCESS_POOL_MIN_FILES = 256
+PROCESS_POOL_MIN_BYTES = 1024 * 1024 * 1024
+
+
+def partial_hash(path, size):
+    """Hash of the first and last BLOCK_SIZE bytes of a file, None when it cannot be read."""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as file:
+            digest.update(file.read(BLOCK_SIZE))
+            if size > BLOCK_SIZE:
+                file.seek(max(size - BLOCK_SIZE, BLOCK_SIZE))
+                digest.update(file.read(BLOCK_SIZE))
+    except OSError:
+        return None
+    return digest.digest()
+
+
+def full_hash(path):
+    """Returns (path, hash of the whole file); the file is memory-mapped, not read in Python chunks."""
+    digest = hashlib.blake2b()
+    try:
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size:  # Empty files cannot be mapped
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+    except OSError:
+        return path, None
+    return path, digest.digest()
+
+
+class SizeIndex:
+    """Sizes of the files already filed in destination folders, kept in memory.
+
+    A folder is listed and its files stat-ed once, the first time it is
+    asked for; files filed after that are added with add(). A long watch
+    can then look for duplicates among the filed files without scanning
+    the folders again.
+    """
+
+    def __init__(self):
+        self._folders = {}  # folder -> {size: [paths]}
+        self._lock = threading.Lock()
+
+    def _sizes(self, folder):
+        sizes = self._folders.get(folder)
+        if sizes is None:
+            sizes = {}
+            try:
+                files, _ = list_folder(folder)
+            except FileNotFoundError:
+                files = []
+            for item in files:
+                try:
+                    if not item.is_symlink():
+                        sizes.setdefault(item.stat().st_size, []).append(item.path)
+                except OSError:
+                    pass  # Gone since it was listed
+            with self._lock:
+                sizes = self._folders.setdefault(folder, sizes)
+        return sizes
+
+    def matching(self, folder, sizes):
+        """Returns (path, size) of the files in folder with one of the given sizes."""
+        by_size = self._sizes(folder)
+        with self._lock:
+            return [(path, size) for size in sizes for path in by_size.get(size, ())]
+
+    def add(self, path, size):
+        """Records a file just filed at path."""
+        by_size = self._sizes(os.path.dirname(path))
+        with self._lock:
+            by_size.setdefault(size, []).append(path)
+
+
+def _signature(path):
+    try:
+        return signature(os.stat(path))
+    except OSError:
+        return None
+
+
+def find_duplicates(files, max_workers=None, cache=None):
+    """Groups byte-identical files.
+
+    files is a list of (path, size). Files are grouped by size first, then
+    by a hash of their first and last blocks; only files still colliding
+    after that, and bigger than those two blocks, are fully hashed: in
+    threads, or in a process pool when that is a lot of work. Returns
+    lists of paths, each in the order of `files`.
+    Empty and unreadable files are never reported.
+
+    With a ScanCache, hashes of files unchanged since an earlier run are
+    reused and new ones are stored.
+    """
+    by_size = {}
+    for path, size in files:
+        if size:
+            by_size.setdefault(size, []).append(path)
+    candidates = [(path, size) for size, paths in by_size.items() if len(paths) > 1 for path in paths]
+
+    signatures = {}
+    if cache is not None:
+        signatures = {path: _signature(path) for path, _ in candidates}
+
+    def quick_hash(item):
+        path, size = item
+        file_signature = signatures.get(path)
+        if file_signature is not None:
+            cached, _ = cache.hashes(path, file_signature)
+            if cached is not None:
+                return cached
+        digest = partial_hash(path, size)
+        if file_signature is not None and digest is not None:
+            cache.store_hashes(path, file_signature, partial=digest)
+        return digest
+
+    with ThreadPoolExecutor(max_workers=PARTIAL_WORKERS) as executor:
+        partials = list(executor.map(quick_hash, candidates))
+    by_partial = {}
+    for (path, size), digest in zip(candidates, partials):
+        if digest is not None:
+            by_partial.setdefault((size, digest), []).append(path)
+
+    groups = []
+    to_hash = []
+    sizes = {}
+    for (size, _), paths in by_partial.items():
+        if len(paths) < 2:
+            continue
+        # The two blocks already covered the whole file
+        if size <= 2 * BLOCK_SIZE:
+            groups.append(paths)
+        else:
+            to_hash.append(paths)
+            sizes.update((path, size) for path in paths)
+    if not to_hash:
+        return groups
+
+    digests = {}
+    for paths in to_hash:
+        for path in paths:
+            if signatures.get(path) is not None:
+                _, digests[path] = cache.hashes(path, signatures[path])
+    missing = [path for paths in to_hash for path in paths if digests.get(path) is None]
+    if missing:
+        if len(missing) >= PROCESS_POOL_MIN_FILES and sum(sizes[path] for path in missing) >= PROCESS_POOL_MIN_BYTES:
+            # Spawned workers do not inherit the UI's threads
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers or PARTIAL_WORKERS)
+        with executor:
+            for path, digest in executor.map(full_hash, missing):
+                digests[path] = digest
+                if digest is not None and signatures.get(path) is not None:
+                    cache.store_hashes(path, signatures[path], digest=digest)
+    for paths in to_hash:
+        by_digest = {}
+        for path in paths:
+            if digests[path] is not None:
+                by_digest.setdefault(digests[path], []).append(path)
+        groups.extend(group for group in by_digest.values() if len(group) > 1)
+    return groups
@@ -1,15 +1,30 @@
 import os
-import shutil
+import errno
+import re
 import logging
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
 import flet
 from flet import (
     Page, TextField, FilePicker, FilePickerResultEvent, SnackBar, ElevatedButton,
     Text, ProgressBar, Column, FontWeight, colors, MainAxisAlignment, Row,
-    Container, ListView
+    Container, Dropdown, dropdown, Checkbox, ListView
 )
 from flet_core import CrossAxisAlignment, TextAlign, ScrollMode, Icon, icons
 
+from mover import MoveExecutor, MOVE_WORKERS
+from name_index import NameIndex
+from journal import MoveJournal, journal_filename, last_run, drop_last_run
+from duplicates import DUPLICATE_ACTIONS, SizeIndex, find_duplicates
+from tree_view import LazyTreeView
+from jobs import BackgroundJob, ProgressThrottle
+from watcher import FolderWatcher
+from transfer import transfer
+from scan_cache import ScanCache, list_folder
+from rules import RuleSet, load_rules
+
 # Define the mapping of file extensions to folder names
 FILE_TYPE_MAPPING = {
     'Documents': ['.pdf', '.docx', '.doc', '.txt', '.xlsx', '.pptx'],
@@ -22,6 +37,18 @@ FILE_TYPE_MAPPING = {
     'Others': []  # Files that don't match any category will go here
 }
 
+# Threads used to plan destination folders concurrently (helps on network shares)
+PLAN_WORKERS = 8
+
+# Folder duplicates are moved to when they are quarantined
+QUARANTINE_FOLDER = 'Duplicates'
+
+# Moves listed in the preview; the rest is only counted
+PREVIEW_LIMIT = 1000
+
+# JSON file with user categories and rules (see readme.md)
+RULES_FILE = os.environ.get('FILE_ORGANIZER_RULES', 'organizer_rules.json')
+
 # Configure logging
 logging.basicConfig(
     filename='file_organizer.log',
@@ -29,87 +56,375 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def get_category(file_extension):
-    for category, extensions in FILE_TYPE_MAPPING.items():
-        if file_extension.lower() in extensions:
-            return category
-    return 'Others'
-
-def resolve_conflict(destination_folder, filename):
-    name, extension = os.path.splitext(filename)
-    counter = 1
-    new_filename = filename
-    while os.path.exists(os.path.join(destination_folder, new_filename)):
-        new_filename = f"{name} ({counter}){extension}"
-        counter += 1
-    return new_filename
-
-def organize_files(target_directory, progress_callback=None):
-    total_files = sum([len(files) for _, _, files in os.walk(target_directory)])
-    if total_files == 0:
-        total_files = 1  # Prevent division by zero
-    processed_files = 0
-
-    for item in os.listdir(target_directory):
-        item_path = os.path.join(target_directory, item)
-
-        if os.path.isdir(item_path):
-            continue
-
-        _, extension = os.path.splitext(item)
-        category = get_category(extension)
-
-        destination_folder = os.path.join(target_directory, category)
+# The rules are compiled once at startup
+try:
+    RULES = load_rules(RULES_FILE, FILE_TYPE_MAPPING)
+except (OSError, ValueError, TypeError, re.error) as e:
+    logging.error(f"Ignoring invalid rules file {RULES_FILE}: {e}")
+    RULES = RuleSet(FILE_TYPE_MAPPING)
+
+def resolve_conflict(destination_folder, filename, names):
+    """Returns a free name for filename in destination_folder from the NameIndex `names`."""
+    return names.claim(destination_folder, filename)
+
+def move_file(source, destination, names, transfer_progress=None):
+    """Moves source to destination without overwriting a file that appeared there since planning.
+
+    transfer() refuses to replace an existing file atomically; on such a
+    clash the next free name is taken from `names` and the move retried.
+    transfer_progress(source, copied, total) gets the bytes copied when the
+    file has to be copied to another device. Returns the path the file was
+    actually moved to.
+    """
+    destination_folder, filename = os.path.split(destination)
+    progress = functools.partial(transfer_progress, source) if transfer_progress else None
+    while True:
+        try:
+            return transfer(source, destination, progress)
+        except FileExistsError:
+            names.add(destination_folder, filename)
+            filename = resolve_conflict(destination_folder, os.path.basename(source), names)
+            destination = os.path.join(destination_folder, filename)
+
+def scan_directory(target_directory):
+    """Lists the files directly inside target_directory in a single os.scandir pass.
+
+    DirEntry caches the file type from the directory listing, so telling
+    files from folders needs no extra stat call per entry.
+    """
+    with os.scandir(target_directory) as entries:
+        return [entry for entry in entries if not entry.is_dir()]
+
+def scan_tree(target_directory, skip=(), workers=PLAN_WORKERS, cache=None):
+    """Lists the files of target_directory and of all its subfolders, sorted by path.
+
+    Top-level folders named in `skip` (the category folders) are left out.
+    Folders are listed in parallel on a thread pool; with a ScanCache,
+    folders unchanged since the last run are not listed again.
+    """
+    list_files = cache.listing if cache is not None else list_folder
+
+    def visit(folder):
+        try:
+            return list_files(folder)
+        except (PermissionError, FileNotFoundError) as e:
+            logging.warning(f"Skipping {folder}: {e}")
+            return [], []
+
+    files, subfolders = visit(target_directory)
+    with ThreadPoolExecutor(max_workers=max(workers or 1, 1)) as executor:
+        pending = {executor.submit(visit, folder) for folder in subfolders if os.path.basename(folder) not in skip}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                folder_files, subfolders = future.result()
+                files.extend(folder_files)
+                pending |= {executor.submit(visit, folder) for folder in subfolders}
+    files.sort(key=lambda entry: entry.path)
+    return files
+
+def scan(target_directory, recursive=False, workers=PLAN_WORKERS, cache=None):
+    """The files to organize: the top level of target_directory, or everything outside the category folders."""
+    if not recursive:
+        return scan_directory(target_directory)
+    return scan_tree(target_directory, set(RULES.categories) | {QUARANTINE_FOLDER}, workers, cache)
+
+def plan_destination(target_directory, category, entries, names):
+    """Plans the moves of all files going to one category folder.
+
+    Names are claimed in order in the NameIndex, so two files of the batch
+    can never be given the same destination name. Nothing on disk changes.
+    """
+    destination_folder = os.path.join(target_directory, category)
+    return [
+        (entry.path, os.path.join(destination_folder, resolve_conflict(destination_folder, entry.name, names)))
+        for entry in entries
+    ]
+
+def iter_plan(target_directory, entries, workers=PLAN_WORKERS, rules=None, names=None):
+    """Yields the (source, destination) moves for the scanned entries, one batch per category folder.
+
+    Each category folder is planned independently, on a thread pool when
+    `workers` > 1, so the listings of different folders overlap; batches
+    are yielded as soon as they are ready.
+    """
+    rules = rules or RULES
+    names = names if names is not None else NameIndex()
+    by_category = {}
+    for entry in entries:
+        by_category.setdefault(rules.classify(entry.name, entry.stat), []).append(entry)
+
+    if workers and workers > 1 and len(by_category) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(plan_destination, target_directory, category, group, names)
+                for category, group in by_category.items()
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+    else:
+        for category, group in by_category.items():
+            yield plan_destination(target_directory, category, group, names)
+
+def plan_moves(target_directory, entries, workers=PLAN_WORKERS, rules=None, names=None):
+    """Returns the whole move plan for the scanned entries as one list."""
+    return [move for moves in iter_plan(target_directory, entries, workers, rules, names) for move in moves]
+
+def preview_organize(target_directory, plan_callback, workers=PLAN_WORKERS, recursive=False, cache=None,
+                     progress_callback=None, cancel=None):
+    """Dry run: computes the move plan without touching the disk.
+
+    plan_callback receives each batch of (source, destination) moves as
+    soon as it is planned. Setting the `cancel` event stops after the
+    current batch. Returns the number of files that would move.
+    """
+    target_directory = os.path.abspath(target_directory)
+    entries = scan(target_directory, recursive, workers, cache)
+    if cache is not None:
+        cache.commit()  # Keeps the listings and frees the database for other processes
+    planned = 0
+    for moves in iter_plan(target_directory, entries, workers):
+        planned += len(moves)
+        plan_callback(moves)
+        if progress_callback:
+            progress_callback(planned / len(entries) * 100)
+        if cancel is not None and cancel.is_set():
+            break
+    return planned
+
+def create_folders(moves):
+    """Creates the destination folders of a move plan, once per folder."""
+    for destination_folder in {os.path.dirname(destination) for _, destination in moves}:
         os.makedirs(destination_folder, exist_ok=True)
 
-        new_filename = resolve_conflict(destination_folder, item)
-        destination_path = os.path.join(destination_folder, new_filename)
-
+def split_duplicates(target_directory, entries, rules=None, cache=None, filed=None):
+    """Splits scanned entries into (unique entries, [(duplicate entry, path of the copy kept)]).
+
+    Files are compared with each other and with the files already in their
+    destination folders. Of identical files, one already filed is kept,
+    else the first by name. With a SizeIndex `filed`, the destination
+    folders are looked up there instead of being listed and stat-ed.
+    """
+    rules = rules or RULES
+    scanned = {entry.path: entry for entry in entries if not entry.is_symlink()}
+    sizes = {entry.stat().st_size for entry in scanned.values()}
+    files = []
+    for destination_folder in {os.path.join(target_directory, rules.classify(entry.name, entry.stat)) for entry in entries}:
+        if filed is not None:
+            files.extend(filed.matching(destination_folder, sizes))
+            continue
         try:
-            shutil.move(item_path, destination_path)
-            logging.info(f"Moved: {item_path} -> {destination_path}")
-        except Exception as e:
-            logging.error(f"Error moving {item_path} to {destination_path}: {e}")
+            listed, _ = cache.listing(destination_folder) if cache is not None else list_folder(destination_folder)
+        except FileNotFoundError:
+            continue
+        files.extend((item.path, item.stat().st_size) for item in listed if not item.is_symlink())
+    files.extend((path, entry.stat().st_size) for path, entry in sorted(scanned.items()))
+
+    duplicates = []
+    for group in find_duplicates(files, cache=cache):
+        duplicates.extend((scanned[path], group[0]) for path in group[1:] if path in scanned)
+    duplicate_paths = {entry.path for entry, _ in duplicates}
+    return [entry for entry in entries if entry.path not in duplicate_paths], duplicates
+
+def link_duplicate(source, original, destination):
+    """Files source as a hard link to its identical original, freeing the space of the copy."""
+    os.link(original, destination)
+    os.remove(source)
+
+def organize_files(target_directory, progress_callback=None, workers=PLAN_WORKERS, move_workers=MOVE_WORKERS,
+                   duplicates=None, cancel=None, transfer_progress=None, recursive=False, cache=None):
+    """Organizes the files of target_directory into category folders; see organize_entries.
+
+    With recursive, files of subfolders are organized too, except those
+    already in category folders. A ScanCache spares rescanning unchanged
+    folders and rehashing unchanged files on later runs.
+    """
+    target_directory = os.path.abspath(target_directory)
+    entries = scan(target_directory, recursive, workers, cache)
+    try:
+        return organize_entries(target_directory, entries, progress_callback, workers, move_workers, duplicates,
+                                cancel, transfer_progress=transfer_progress, cache=cache)
+    finally:
+        if cache is not None:
+            cache.commit()
+
+def organize_entries(target_directory, entries, progress_callback=None, workers=PLAN_WORKERS,
+                     move_workers=MOVE_WORKERS, duplicates=None, cancel=None, names=None, transfer_progress=None,
+                     cache=None, journal=None, filed=None, failed=None):
+    """Files the given entries of target_directory (an absolute path) into category folders.
+
+    duplicates decides what happens to files whose content is already
+    there: None files them under a new name like any other name clash,
+    'skip' leaves them where they are, 'hardlink' files them as hard links
+    to the kept copy and 'quarantine' moves them into QUARANTINE_FOLDER.
+
+    Setting the `cancel` event stops the run after the moves in progress;
+    what was moved until then is journaled and can be undone. Returns the
+    number of files moved.
+
+    A NameIndex can be passed in to reuse folder listings across calls.
+    transfer_progress(source, copied, total) reports the bytes of files
+    copied across devices. The ScanCache `cache` is used for the duplicate
+    search.
+
+    Passing an open MoveJournal records the moves in its run, which is
+    flushed but left open, instead of a new run. A SizeIndex `filed` is used
+    for the duplicate search and kept up to date with the files filed.
+    The paths of files that could not be moved are appended to the list
+    `failed`.
+    """
+    names = names if names is not None else NameIndex()
+    duplicate_entries = []
+    if duplicates:
+        entries, duplicate_entries = split_duplicates(target_directory, entries, cache=cache, filed=filed)
+        logging.info(f"Found {len(duplicate_entries)} duplicates in {target_directory}, action: {duplicates}")
+    moves = plan_moves(target_directory, entries, workers, names=names)
+    if duplicates == 'quarantine':
+        moves += plan_destination(target_directory, QUARANTINE_FOLDER, [entry for entry, _ in duplicate_entries], names)
+    links = duplicate_entries if duplicates == 'hardlink' else []
+    if not moves and not links:
+        return 0
+    total_files = len(moves) + len(links)
+    processed_files = 0
+    moved_to = {}
+
+    create_folders(moves)
+
+    with contextlib.nullcontext(journal) if journal is not None else MoveJournal(target_directory) as journal:
+        def on_moved(source, destination, error, action=None):
+            # Called by the move workers one at a time
+            nonlocal processed_files
+            if error is None:
+                journal.record(source, destination, action)
+                moved_to[source] = destination
+                if filed is not None and not os.path.islink(destination):
+                    filed.add(destination, os.stat(destination).st_size)
+            else:
+                # Nothing was moved there: free the name for a later attempt
+                names.release(*os.path.split(destination))
+                if failed is not None:
+                    failed.append(source)
+            processed_files += 1
+            if progress_callback:
+                progress_callback(processed_files / total_files * 100)
+
+        move = functools.partial(move_file, names=names, transfer_progress=transfer_progress)
+        with MoveExecutor(workers=move_workers, move=move, on_done=on_moved, log_moves=False, cancel=cancel) as executor:
+            for item_path, destination_path in moves:
+                if cancel is not None and cancel.is_set():
+                    break
+                executor.submit(item_path, destination_path)
+
+        # Links go last: the copy they point to may be one of the files just moved
+        originals = {entry.path: original for entry, original in links}
+
+        def link(source, destination):
+            original = originals[source]
+            link_duplicate(source, moved_to.get(original, original), destination)
+
+        on_linked = functools.partial(on_moved, action='hardlink')
+        with MoveExecutor(workers=move_workers, move=link, on_done=on_linked, log_moves=False, cancel=cancel) as linker:
+            for entry, _ in links:
+                if cancel is not None and cancel.is_set():
+                    break
+                destination_folder = os.path.join(target_directory, RULES.classify(entry.name, entry.stat))
+                os.makedirs(destination_folder, exist_ok=True)
+                linker.submit(entry.path, os.path.join(destination_folder, resolve_conflict(destination_folder, entry.name, names)))
+        journal.flush()
+
+    logging.info(f"Organized {target_directory}: {executor.moved + linker.moved} moved, "
+                 f"{executor.failed + linker.failed} failed, {executor.skipped + linker.skipped} cancelled, "
+                 f"journal {journal.path}")
+    return executor.moved + linker.moved
+
+def watch_folder(target_directory, on_batch=None, duplicates=None, poll=False):
+    """Starts filing files into category folders as they arrive in target_directory.
+
+    Files already there are organized first. on_batch(moved) is called
+    after every batch. Returns the running FolderWatcher; stop() it to end.
+
+    The whole watch is one run in the journal, so Undo Last Run reverts
+    every file filed since the watch started.
+    """
+    target_directory = os.path.abspath(target_directory)
+    # Kept for the whole watch, so folders are listed only once
+    names = NameIndex()
+    filed = SizeIndex() if duplicates else None
+    journal = MoveJournal(target_directory)
+
+    def organize_batch(entries):
+        failed = []
+        moved = organize_entries(target_directory, entries, duplicates=duplicates, names=names, journal=journal,
+                                 filed=filed, failed=failed)
+        if moved:
+            logging.info(f"Watch: filed {moved} new files in {target_directory}")
+        if on_batch:
+            on_batch(moved)
+        return failed  # The watcher tries these again later
+
+    return FolderWatcher(target_directory, organize_batch, poll=poll,
+                         initial_entries=scan_directory(target_directory), on_stop=journal.close).start()
+
+def move_back(source, destination, copy=False):
+    if not os.path.lexists(source):
+        if os.path.lexists(destination):
+            return destination  # Already restored by an earlier, interrupted undo
+        raise FileNotFoundError(errno.ENOENT, "Deleted since it was organized", source)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)  # Its subfolder may have been removed since
+    # Undo never overwrites (transfer raises FileExistsError): the original name may have been reused since the run
+    return transfer(source, destination, copy=copy)
+
+def undo_last_run(target_directory, progress_callback=None, move_workers=MOVE_WORKERS, cancel=None, missing=None):
+    """Moves the files of the last organize run of target_directory back where they came from.
+
+    The run is read from the journal, undone in reverse order and dropped
+    from the journal once every file is back. Duplicates filed as hard
+    links get their own copy of the data back, not a link to the kept file.
+    Files deleted since the run are skipped and their paths appended to the
+    list `missing`; they do not keep the run in the journal. Category
+    folders left empty are removed. Returns the number of files restored.
+    A cancelled undo keeps the run in the journal, so it can simply be
+    undone again.
+    """
+    missing = missing if missing is not None else []
+    path = journal_filename(target_directory)
+    if not os.path.exists(path):
+        return 0
+    offset, moves = last_run(path)
+    total_files = len(moves) or 1
+    processed_files = 0
 
+    def on_restored(source, destination, error):
+        nonlocal processed_files
+        if isinstance(error, FileNotFoundError):
+            missing.append(source)
         processed_files += 1
         if progress_callback:
             progress_callback(processed_files / total_files * 100)
 
-def build_tree_view(folder_path, level=0):
-    """Recursively builds a tree view of files and folders."""
-    tree_view = []
+    links = {destination for _, destination, *action in moves if action == ['hardlink']}
 
-    try:
-        for item in os.listdir(folder_path):
-            item_path = os.path.join(folder_path, item)
-
-            if os.path.isdir(item_path):
-                # Add folder name with indentation
-                tree_view.append(
-                    Row(
-                        [
-                            Text("  " * level + "📁 " + item, weight=FontWeight.BOLD),
-                        ],
-                        alignment=MainAxisAlignment.START
-                    )
-                )
-                # Recursion for subfolders
-                tree_view.extend(build_tree_view(item_path, level + 1))
-            else:
-                # Add file name with indentation
-                tree_view.append(
-                    Row(
-                        [
-                            Text("  " * level + "📄 " + item),
-                        ],
-                        alignment=MainAxisAlignment.START
-                    )
-                )
+    def restore(source, destination):
+        return move_back(source, destination, copy=source in links)
 
-    except PermissionError:
-        logging.warning(f"Permission denied: {folder_path}")
+    with MoveExecutor(workers=move_workers, move=restore, on_done=on_restored, log_moves=False, cancel=cancel) as executor:
+        for source, destination, *_ in reversed(moves):
+            if cancel is not None and cancel.is_set():
+                break
+            executor.submit(destination, source)
 
-    return tree_view
+    for destination_folder in {os.path.dirname(destination) for _, destination, *_ in moves}:
+        try:
+            os.rmdir(destination_folder)
+        except OSError:
+            pass  # Not empty
+
+    failed = executor.failed - len(missing)
+    if offset is not None and not failed and not (cancel is not None and cancel.is_set()):
+        drop_last_run(path, offset)
+    logging.info(f"Undid last run of {target_directory}: {executor.moved} restored, {len(missing)} missing, "
+                 f"{failed} failed")
+    return executor.moved
 
 def main(page: Page):
     page.title = "File Organizer"
@@ -123,8 +438,10 @@ def main(page: Page):
 
     progress_bar = ProgressBar(width=700, visible=False)
     status_text = Text("", size=15)
+    tree_view = LazyTreeView()
+    preview_list = ListView(expand=1, spacing=0)  # Shown in place of the tree during a preview
     tree_view_container = Container(
-        content=ListView(height=300, expand=1),
+        content=tree_view.view,
         width=780,   # Adjust based on your window width
         height=300,  # Fixed height for the tree view
         border_radius=5,
@@ -141,48 +458,184 @@ def main(page: Page):
     def select_folder(e):
         file_picker.get_directory_path()
 
-    def start_organizing(e):
-        folder = selected_folder.value.strip()
+    # Function to check the chosen folder, showing a message when it is unusable
+    def chosen_folder():
+        folder = selected_folder.value.strip() if selected_folder.value else ""
         if not folder:
-            page.snack_bar = SnackBar(content=Text("Please choose a folder to organize."))
-            page.snack_bar.open = True
+            message = "Please choose a folder to organize."
+        elif not os.path.exists(folder):
+            message = "Folder does not exist."
+        else:
+            return folder
+        page.snack_bar = SnackBar(content=Text(message))
+        page.snack_bar.open = True
+        page.update()
+        return None
+
+    scan_cache = ScanCache()  # Lets repeated runs skip unchanged subfolders and files
+    job = None  # Organize, undo or preview run in the background
+    watcher = None  # Watch mode, while it is on
+    watched_files = 0
+
+    # Function to switch the controls between idle and running
+    def set_busy(busy):
+        organize_button.disabled = undo_button.disabled = preview_button.disabled = select_button.disabled = busy
+        watch_button.disabled = busy
+        cancel_button.visible = progress_bar.visible = busy
+        cancel_button.disabled = False
+
+    # Function to run organize/undo/preview work on a background thread, with throttled progress
+    def run_in_background(folder, label, work, finished, show_tree=True):
+        nonlocal job
+        set_busy(True)
+        progress_bar.value = 0
+        status_text.value = f"{label}..."
+        page.update()
+
+        def update_progress(progress):
+            progress_bar.value = progress / 100
+            status_text.value = f"{label}... {progress:.0f}%"
+            page.update()
+
+        def done(result, error):
+            if show_tree:
+                tree_view.show(folder)
+                tree_view_container.content = tree_view.view
+            set_busy(False)
+            if error is not None:
+                status_text.value = f"{label} failed: {error}"
+            elif current.cancelled:
+                status_text.value = f"{label} cancelled after {result} files."
+            else:
+                status_text.value = finished(result)
             page.update()
+
+        current = job = BackgroundJob(work, on_progress=update_progress, on_done=done)
+        current.start()
+
+    def start_organizing(e):
+        folder = chosen_folder()
+        if not folder:
             return
 
-        if not os.path.exists(folder):
-            page.snack_bar = SnackBar(content=Text("Folder does not exist."))
-            page.snack_bar.open = True
+        def show_copy(percent, source):
+            status_text.value = f"Organizing... copying {os.path.basename(source)} {percent:.0f}%"
+            page.update()
+
+        # Byte progress of files copied to another drive, e.g. big videos
+        copy_progress = ProgressThrottle(show_copy)
+        duplicates = None if duplicates_dropdown.value == "Rename" else duplicates_dropdown.value.lower()
+        run_in_background(
+            folder, "Organizing",
+            lambda cancel, progress: organize_files(
+                folder, progress_callback=progress, duplicates=duplicates, cancel=cancel,
+                recursive=subfolders_checkbox.value, cache=scan_cache,
+                transfer_progress=lambda source, copied, total: copy_progress(copied / total * 100 if total else 100, source),
+            ),
+            lambda moved: "Organization complete!",
+        )
+
+    def cancel_running(e):
+        if job is not None and job.running:
+            job.cancel()
+            cancel_button.disabled = True
+            status_text.value = "Cancelling..."
             page.update()
+
+    # Function to list the planned moves without touching any file
+    def preview_organizing(e):
+        folder = chosen_folder()
+        if not folder:
             return
 
-        organize_button.disabled = True
-        select_button.disabled = True
-        progress_bar.visible = True
-        status_text.value = "Organizing..."
-        progress_bar.value = 0
-        page.update()
+        listing = preview_list.controls
+        listing.clear()
+        tree_view_container.content = preview_list
+        recursive = subfolders_checkbox.value
 
-        def update_progress(progress):
-            progress_bar.value = progress / 100
-            status_text.value = f"Organizing... {progress:.2f}%"
+        def show_moves(moves):
+            # Called on the job's thread as each batch is planned
+            room = PREVIEW_LIMIT - len(listing)
+            for source, destination in moves[:max(room, 0)]:
+                listing.append(Text(f"{os.path.basename(source)}  →  {os.path.relpath(destination, folder)}"))
             page.update()
 
-        organize_files(folder, progress_callback=update_progress)
+        def finished(planned):
+            if planned > PREVIEW_LIMIT:
+                listing.append(Text(f"... and {planned - PREVIEW_LIMIT} more", italic=True))
+            return f"Preview: {planned} files would be moved."
+
+        run_in_background(
+            folder, "Planning",
+            lambda cancel, progress: preview_organize(folder, show_moves, recursive=recursive, cache=scan_cache,
+                                                      progress_callback=progress, cancel=cancel),
+            finished,
+            show_tree=False,
+        )
+
+    # Function to turn watch mode on and off
+    def toggle_watching(e):
+        nonlocal watcher, watched_files
+        if watcher is not None:
+            watcher.stop()
+            watcher = None
+            watch_button.text = "Watch Folder"
+            organize_button.disabled = undo_button.disabled = preview_button.disabled = select_button.disabled = False
+            status_text.value = f"Stopped watching, {watched_files} files filed."
+            page.update()
+            return
+
+        folder = chosen_folder()
+        if not folder:
+            return
 
-        # Display the tree view after organizing
-        tree_view_container.content.controls.clear()
-        tree_view_container.content.controls.extend(build_tree_view(folder))
+        def on_batch(moved):
+            nonlocal watched_files
+            watched_files += moved
+            status_text.value = f"Watching {folder}: {watched_files} files filed."
+            page.update()
 
-        organize_button.disabled = False
-        select_button.disabled = False
-        progress_bar.visible = False
-        status_text.value = "Organization complete!"
+        duplicates = None if duplicates_dropdown.value == "Rename" else duplicates_dropdown.value.lower()
+        watched_files = 0
+        watcher = watch_folder(folder, on_batch=on_batch, duplicates=duplicates)
+        watch_button.text = "Stop Watching"
+        organize_button.disabled = undo_button.disabled = preview_button.disabled = select_button.disabled = True
+        status_text.value = f"Watching {folder}..."
         page.update()
 
+    # Function to move the files of the last run back
+    def undo_organizing(e):
+        folder = chosen_folder()
+        if not folder:
+            return
+
+        missing = []
+
+        def summary(restored):
+            if missing:
+                return f"Restored {restored} files, skipped {len(missing)} deleted since the run."
+            return f"Restored {restored} files." if restored else "Nothing to undo."
+
+        run_in_background(
+            folder, "Undoing",
+            lambda cancel, progress: undo_last_run(folder, progress_callback=progress, cancel=cancel, missing=missing),
+            summary,
+        )
 
     # Create buttons
     select_button = ElevatedButton(text="Select Folder", on_click=select_folder)
     organize_button = ElevatedButton(text="Organize Files", on_click=start_organizing)
+    preview_button = ElevatedButton(text="Preview", on_click=preview_organizing)
+    undo_button = ElevatedButton(text="Undo Last Run", on_click=undo_organizing)
+    cancel_button = ElevatedButton(text="Cancel", on_click=cancel_running, visible=False)
+    watch_button = ElevatedButton(text="Watch Folder", on_click=toggle_watching)
+    subfolders_checkbox = Checkbox(label="Include subfolders", value=False)
+    duplicates_dropdown = Dropdown(
+        label="Duplicates",
+        width=150,
+        value="Rename",
+        options=[dropdown.Option("Rename")] + [dropdown.Option(action.capitalize()) for action in DUPLICATE_ACTIONS],
+    )
 
     # Arrange components in the page
     page.add(
@@ -204,7 +657,13 @@ def main(page: Page):
                 ),
                 Row(
                     [
+                        subfolders_checkbox,
+                        duplicates_dropdown,
+                        preview_button,
                         organize_button,
+                        undo_button,
+                        watch_button,
+                        cancel_button,
                     ],
                     alignment=MainAxisAlignment.CENTER,
                     spacing=10
@@ -0,0 +1,76 @@
+import logging
+import threading
+import time
+
+# Seconds between two progress reports (10 Hz)
+PROGRESS_INTERVAL = 0.1
+
+
+class ProgressThrottle:
+    """Wraps a progress callback so it is called at most every `interval` seconds.
+
+    With min_step, a report also needs the progress to have grown by that
+    many percent. 100% is always reported. Extra arguments are passed on.
+    """
+
+    def __init__(self, callback, interval=PROGRESS_INTERVAL, min_step=0):
+        self.callback = callback
+        self.interval = interval
+        self.min_step = min_step
+        self._last_time = 0.0
+        self._last_progress = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, progress, *args):
+        now = time.monotonic()
+        with self._lock:
+            if progress < 100 and (now - self._last_time < self.interval
+                                   or progress - self._last_progress < self.min_step):
+                return
+            self._last_time = now
+            self._last_progress = progress
+        self.callback(progress, *args)
+
+
+class BackgroundJob:
+    """Runs func(cancel_event, progress_callback) on a background thread.
+
+    Progress is throttled before it reaches on_progress; on_done(result,
+    error) is called on the job's thread once func returns or raises.
+    cancel() sets the event, which func is expected to check.
+    """
+
+    def __init__(self, func, on_progress=None, on_done=None, interval=PROGRESS_INTERVAL, min_step=0):
+        self.func = func
+        self.on_done = on_done
+        self.progress = ProgressThrottle(on_progress or (lambda progress: None), interval, min_step)
+        self.cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        result = error = None
+        try:
+            result = self.func(self.cancel_event, self.progress)
+        except Exception as e:
+            logging.exception("Background job failed")
+            error = e
+        if self.on_done:
+            self.on_done(result, error)
@@ -0,0 +1,143 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+# Folder holding one journal file per organized folder
+JOURNAL_DIR = os.environ.get('FILE_ORGANIZER_JOURNALS', 'journals')
+# Moves buffered in memory before they are written out
+FLUSH_EVERY = 1000
+# Bytes read at a time when searching a journal backwards from its end
+READ_BLOCK = 64 * 1024
+
+
+def journal_filename(target_directory):
+    """Journal file of an organized folder, named after a hash of its absolute path."""
+    digest = hashlib.sha1(os.path.abspath(target_directory).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(JOURNAL_DIR, f"{digest}.jsonl")
+
+
+class MoveJournal:
+    """Append-only JSON-lines journal of the moves of one organize run.
+
+    The run starts with a header line ({"run": ..., "target": ...}) and is
+    followed by one compact [source, destination] line per move, or
+    [source, destination, action] when the file was not simply moved (a
+    'hardlink' duplicate was filed as a link to its original). Lines are
+    buffered and written FLUSH_EVERY moves at a time, and on close(). The
+    header is only written with the first move, so a run that moved
+    nothing leaves no trace.
+    """
+
+    def __init__(self, target_directory, path=None, flush_every=FLUSH_EVERY):
+        self.path = path or journal_filename(target_directory)
+        self.flush_every = flush_every
+        self._header = {"run": datetime.datetime.now().isoformat(timespec='seconds'),
+                        "target": os.path.abspath(target_directory)}
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, source, destination, action=None):
+        with self._lock:
+            if self._header is not None:
+                self._buffer.append(json.dumps(self._header) + '\n')
+                self._header = None
+            line = [source, destination] if action is None else [source, destination, action]
+            self._buffer.append(json.dumps(line) + '\n')
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        """Writes out the moves buffered so far."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            _drop_torn_line(self.path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(''.join(self._buffer))
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+
+
+def _rfind(file, end, pattern):
+    """Returns the offset of the last `pattern` before `end` in the binary file, -1 when there is none."""
+    position = end
+    while position > 0:
+        start = max(0, position - READ_BLOCK)
+        file.seek(start)
+        # Overlap the next block a little, so a pattern across the boundary is found
+        chunk = file.read(min(end, position + len(pattern) - 1) - start)
+        index = chunk.rfind(pattern)
+        if index >= 0:
+            return start + index
+        position = start
+    return -1
+
+
+def _complete_size(file):
+    """Returns the size of the file without a torn last line left by a crash in the middle of a write."""
+    size = file.seek(0, os.SEEK_END)
+    return _rfind(file, size, b'\n') + 1
+
+
+def _drop_torn_line(path):
+    try:
+        with open(path, 'r+b') as file:
+            size = _complete_size(file)
+            if size != file.seek(0, os.SEEK_END):
+                file.truncate(size)
+    except FileNotFoundError:
+        pass
+
+
+def last_run(path):
+    """Returns (offset of the last run's header, [(source, destination[, action])]) of a journal.
+
+    The header is searched backwards from the end of the file, so only the
+    last run is read however long the history is. A torn last line is
+    ignored, and so are runs without moves. The offset is None when the
+    journal holds no run.
+    """
+    with open(path, 'rb') as file:
+        end = _complete_size(file)
+        while end > 0:
+            offset = _rfind(file, end, b'\n{') + 1
+            file.seek(offset)
+            lines = file.read(end - offset).splitlines()
+            if not lines[0].startswith(b'{'):
+                return None, []
+            if len(lines) > 1:
+                return offset, [tuple(json.loads(line)) for line in lines[1:]]
+            end = offset
+    return None, []
+
+
+def drop_last_run(path, offset):
+    """Removes the last run, starting at its header `offset`, and anything after it from the journal."""
+    with open(path, 'r+b') as file:
+        file.truncate(offset)
+    if not offset:
+        os.remove(path)
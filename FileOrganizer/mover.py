@@ -0,0 +1,124 @@
+import logging
+import queue
+import shutil
+import threading
+
+# Default number of move threads; slow network shares benefit from more
+MOVE_WORKERS = 4
+# Moves that may wait per worker before submit() blocks
+QUEUE_SIZE = 256
+
+_STOP = object()
+
+
+class MoveExecutor:
+    """Runs file moves on a bounded pool of worker threads.
+
+    Every destination path is always handled by the same worker, so moves
+    aimed at one name run in the order they were submitted. Each worker
+    has a bounded queue: when it is full, submit() blocks until the worker
+    catches up, which keeps a huge plan from piling up in memory.
+
+    on_done(source, destination, error) is called from the worker thread
+    after every move; error is None on success. An error raised by
+    on_done itself is logged and does not stop the worker. When the move function
+    returns a path, that is the destination reported and logged. Failed
+    moves are always logged; successful ones unless log_moves is False.
+
+    Once the optional `cancel` event is set, moves still queued are
+    skipped instead of run.
+    """
+
+    def __init__(self, workers=MOVE_WORKERS, queue_size=QUEUE_SIZE, move=shutil.move, on_done=None, log_moves=True,
+                 cancel=None):
+        self.move = move
+        self.on_done = on_done
+        self.log_moves = log_moves
+        self.cancel = cancel
+        self.moved = 0
+        self.failed = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._queues = []
+        self._threads = []
+        for _ in range(workers if workers > 1 else 0):
+            lane = queue.Queue(maxsize=queue_size)
+            thread = threading.Thread(target=self._work, args=(lane,), daemon=True)
+            thread.start()
+            self._queues.append(lane)
+            self._threads.append(thread)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, source, destination):
+        """Queues one move; runs it right away when the executor has no threads."""
+        if not self._queues:
+            self._run(source, destination)
+            return
+        index = hash(destination) % len(self._queues)
+        if not self._put(index, (source, destination)):
+            self._run(source, destination)  # Its worker died: nobody would take the move from the queue
+
+    def close(self):
+        """Waits for all queued moves to finish and stops the workers."""
+        for index in range(len(self._queues)):
+            self._put(index, _STOP)
+        for thread in self._threads:
+            thread.join()
+        # Moves left behind by a worker that died are run here instead
+        for lane in self._queues:
+            while not lane.empty():
+                job = lane.get_nowait()
+                if job is not _STOP:
+                    self._run(*job)
+        self._queues = []
+        self._threads = []
+
+    def _put(self, index, job):
+        """Queues job for worker index; False when that worker is no longer running."""
+        lane, thread = self._queues[index], self._threads[index]
+        while thread.is_alive():
+            try:
+                lane.put(job, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _work(self, lane):
+        while True:
+            job = lane.get()
+            if job is _STOP:
+                return
+            try:
+                self._run(*job)
+            except Exception as e:
+                logging.error(f"Error in move worker: {e}")
+
+    def _run(self, source, destination):
+        if self.cancel is not None and self.cancel.is_set():
+            with self._lock:
+                self.skipped += 1
+            return
+        error = None
+        try:
+            destination = self.move(source, destination) or destination
+            if self.log_moves:
+                logging.info(f"Moved: {source} -> {destination}")
+        except Exception as e:
+            error = e
+            logging.error(f"Error moving {source} to {destination}: {e}")
+        with self._lock:
+            if error is None:
+                self.moved += 1
+            else:
+                self.failed += 1
+            if self.on_done:
+                try:
+                    self.on_done(source, destination, error)
+                except Exception as e:
+                    logging.error(f"Error reporting move of {source}: {e}")
@@ -0,0 +1,65 @@
+import os
+import threading
+
+
+class NameIndex:
+    """The names taken in each destination folder, kept in memory.
+
+    A folder is listed once, the first time a name is claimed in it; after
+    that conflicts are resolved against the index without any stat call.
+    For every clashing name the next free counter is remembered, so a run
+    of "name (1)", "name (2)", ... costs O(1) per file instead of probing
+    the disk for every candidate.
+    """
+
+    def __init__(self):
+        self._folders = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _names(self, folder):
+        names = self._folders.get(folder)
+        if names is None:
+            # Listed outside the lock so different folders are seeded in parallel
+            try:
+                with os.scandir(folder) as entries:
+                    listed = {os.path.normcase(entry.name) for entry in entries}
+            except FileNotFoundError:
+                listed = set()
+            with self._lock:
+                names = self._folders.setdefault(folder, listed)
+        return names
+
+    def add(self, folder, filename):
+        """Marks filename as taken, e.g. because it appeared on disk during the run."""
+        names = self._names(folder)
+        with self._lock:
+            names.add(os.path.normcase(filename))
+
+    def release(self, folder, filename):
+        """Gives back a claimed name, e.g. because the move to it failed."""
+        names = self._names(folder)
+        with self._lock:
+            names.discard(os.path.normcase(filename))
+
+    def claim(self, folder, filename):
+        """Reserves a free name for filename in folder and returns it.
+
+        That is filename itself when it is free, else "name (n).ext" with
+        the lowest counter not handed out before.
+        """
+        names = self._names(folder)
+        with self._lock:
+            if os.path.normcase(filename) not in names:
+                names.add(os.path.normcase(filename))
+                return filename
+            name, extension = os.path.splitext(filename)
+            key = (folder, os.path.normcase(filename))
+            counter = self._counters.get(key, 1)
+            candidate = f"{name} ({counter}){extension}"
+            while os.path.normcase(candidate) in names:
+                counter += 1
+                candidate = f"{name} ({counter}){extension}"
+            self._counters[key] = counter + 1
+            names.add(os.path.normcase(candidate))
+            return candidate
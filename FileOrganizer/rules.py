@@ -0,0 +1,157 @@
+import fnmatch
+import json
+import os
+import re
+import time
+
+DEFAULT_CATEGORY = 'Others'
+DAY = 24 * 60 * 60
+
+
+def build_extension_index(mapping):
+    """Turns {category: [extensions]} into {extension: category}; earlier categories win."""
+    index = {}
+    for category, extensions in mapping.items():
+        for extension in extensions:
+            index.setdefault(extension.lower(), category)
+    return index
+
+
+def suffixes(filename, depth):
+    """Returns the lowercase extensions of filename, longest first.
+
+    With depth 2, "Backup.TAR.GZ" gives [".tar.gz", ".gz"]. A leading dot
+    is not an extension, as with os.path.splitext.
+    """
+    filename = filename.lower()
+    found = []
+    end = len(filename)
+    for _ in range(depth):
+        end = filename.rfind('.', 1, end)
+        if end <= 0:
+            break
+        found.append(filename[end:])
+    found.reverse()
+    return found
+
+
+def _overlaps(rule, index):
+    """Whether an extension of rule is a longer or shorter form of one sending files elsewhere in index.
+
+    Such rules cannot share one lookup: it tries the longest suffix first,
+    so a later ".tar.gz" rule would win over an earlier ".gz" one.
+    """
+    return any(extension != other and (extension.endswith(other) or other.endswith(extension))
+               for extension in rule.extensions for other, category in index.items() if category != rule.category)
+
+
+class Rule:
+    """One user rule: a file matches when all of the given conditions hold.
+
+    Conditions: extensions (compound ones like ".tar.gz" work), glob and
+    regex (both on the file name), min_size/max_size in bytes and
+    older_than_days/newer_than_days on the modification time.
+    """
+
+    def __init__(self, category, extensions=None, glob=None, regex=None, min_size=None, max_size=None,
+                 older_than_days=None, newer_than_days=None):
+        self.category = category
+        self.extensions = {extension.lower() for extension in extensions} if extensions else None
+        self.depth = max((extension.count('.') for extension in self.extensions), default=0) if extensions else 0
+        self.glob = re.compile(fnmatch.translate(glob), re.IGNORECASE) if glob else None
+        self.regex = re.compile(regex) if regex else None
+        self.min_size = min_size
+        self.max_size = max_size
+        self.older_than = older_than_days * DAY if older_than_days is not None else None
+        self.newer_than = newer_than_days * DAY if newer_than_days is not None else None
+        self.needs_stat = any(value is not None for value in (min_size, max_size, older_than_days, newer_than_days))
+
+    @property
+    def extensions_only(self):
+        return self.extensions is not None and self.glob is None and self.regex is None and not self.needs_stat
+
+    def matches(self, name, stat, now):
+        if self.extensions is not None and not self.extensions.intersection(suffixes(name, self.depth)):
+            return False
+        if self.glob is not None and not self.glob.match(name):
+            return False
+        if self.regex is not None and not self.regex.search(name):
+            return False
+        if self.needs_stat:
+            result = stat()
+            if self.min_size is not None and result.st_size < self.min_size:
+                return False
+            if self.max_size is not None and result.st_size > self.max_size:
+                return False
+            age = now - result.st_mtime
+            if self.older_than is not None and age < self.older_than:
+                return False
+            if self.newer_than is not None and age > self.newer_than:
+                return False
+        return True
+
+
+class RuleSet:
+    """Classifies file names into category folders.
+
+    User rules are tried in order and the first match wins; after them the
+    extension mapping is looked up in a hash index. Rules are compiled once:
+    runs of consecutive extension-only rules are merged into one dictionary
+    lookup as long as their extensions cannot overlap, and the file is only
+    stat-ed when a size or date rule is reached.
+    """
+
+    def __init__(self, mapping, rules=()):
+        self.categories = list(dict.fromkeys([rule.category for rule in rules] + list(mapping)))
+        self._steps = []
+        for rule in rules:
+            if rule.extensions_only:
+                if not self._steps or not isinstance(self._steps[-1], dict) or _overlaps(rule, self._steps[-1]):
+                    self._steps.append({})
+                for extension in rule.extensions:
+                    self._steps[-1].setdefault(extension, rule.category)
+            else:
+                self._steps.append(rule)
+        self._steps.append(build_extension_index(mapping))
+        # Whether classify() may call stat at all
+        self.needs_stat = any(getattr(step, 'needs_stat', False) for step in self._steps)
+        self._depth = max([extension.count('.') for step in self._steps if isinstance(step, dict) for extension in step] + [1])
+
+    def classify(self, name, stat=None):
+        """Returns the category of the file called `name`.
+
+        stat is a callable returning the file's os.stat_result, e.g. the
+        bound stat method of an os.DirEntry; it is only called when needed.
+        Without it, size and date rules are skipped.
+        """
+        extensions = None
+        for step in self._steps:
+            if isinstance(step, dict):
+                if extensions is None:
+                    extensions = suffixes(name, self._depth)
+                for extension in extensions:
+                    category = step.get(extension)
+                    if category is not None:
+                        return category
+            elif step.needs_stat:
+                if stat is not None and step.matches(name, stat, time.time()):
+                    return step.category
+            elif step.matches(name, stat, None):
+                return step.category
+        return DEFAULT_CATEGORY
+
+
+def load_rules(path, mapping):
+    """Builds the RuleSet from the default mapping and an optional JSON config file.
+
+    The file may hold "categories" ({name: [extensions]}, added to or
+    replacing the defaults) and "rules" (a list of Rule keyword arguments).
+    """
+    if not path or not os.path.exists(path):
+        return RuleSet(mapping)
+    with open(path, encoding='utf-8') as file:
+        config = json.load(file)
+    merged = dict(config.get('categories', {}))
+    for category, extensions in mapping.items():
+        merged.setdefault(category, extensions)
+    return RuleSet(merged, [Rule(**rule) for rule in config.get('rules', [])])
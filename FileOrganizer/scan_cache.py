@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite file remembering folder listings and file hashes between runs
+SCAN_CACHE_FILE = os.environ.get('FILE_ORGANIZER_CACHE', 'scan_cache.sqlite')
+# A listing taken this soon after its folder changed may have missed a
+# change made in the same mtime tick, so it is not trusted later
+RACY_SECONDS = 2
+
+FILE, FOLDER, LINK = 0, 1, 2
+
+
+class CachedEntry:
+    """Stands in for the os.DirEntry of a file listed from the cache; stat() is real and cached."""
+    __slots__ = ('path', 'name', '_kind', '_stat')
+
+    def __init__(self, path, name, kind):
+        self.path = path
+        self.name = name
+        self._kind = kind
+        self._stat = None
+
+    def is_dir(self, follow_symlinks=True):
+        return self._kind == FOLDER
+
+    def is_symlink(self):
+        return self._kind == LINK
+
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+def signature(stat_result):
+    """What identifies an unchanged file: (size, mtime, inode)."""
+    return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
+
+def list_folder(folder):
+    """Returns the (files, subfolders) of folder from one os.scandir pass.
+
+    Symbolic links to files count as files; links to folders are neither,
+    so a recursive scan cannot loop.
+    """
+    files, subfolders = [], []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subfolders.append(entry.path)
+            elif not entry.is_dir():
+                files.append(entry)
+    return files, subfolders
+
+
+class ScanCache:
+    """Persistent cache of folder listings and file hashes.
+
+    A folder whose (mtime, inode) did not change since it was listed is
+    served from the cache: one stat instead of a directory scan. Hashes
+    are kept per path with the file's (size, mtime, inode) and only reused
+    while that signature still matches.
+    """
+
+    def __init__(self, path=SCAN_CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS folders (path TEXT PRIMARY KEY, mtime_ns INTEGER, inode INTEGER, listed_at REAL);
+            CREATE TABLE IF NOT EXISTS entries (folder TEXT, name TEXT, kind INTEGER, PRIMARY KEY (folder, name));
+            CREATE TABLE IF NOT EXISTS hashes (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,
+                                               partial BLOB, digest BLOB);
+        """)
+
+    def listing(self, folder):
+        """Returns (files, subfolders) of folder like list_folder, from the cache when it is still valid."""
+        result = os.stat(folder)
+        with self._lock:
+            row = self._db.execute("SELECT mtime_ns, inode, listed_at FROM folders WHERE path = ?", (folder,)).fetchone()
+            if row and row[:2] == (result.st_mtime_ns, result.st_ino) and row[2] - result.st_mtime > RACY_SECONDS:
+                self.hits += 1
+                rows = self._db.execute("SELECT name, kind FROM entries WHERE folder = ?", (folder,)).fetchall()
+                files = [CachedEntry(os.path.join(folder, name), name, kind) for name, kind in rows if kind != FOLDER]
+                return files, [os.path.join(folder, name) for name, kind in rows if kind == FOLDER]
+
+        listed_at = time.time()
+        files, subfolders = list_folder(folder)
+        rows = [(folder, entry.name, LINK if entry.is_symlink() else FILE) for entry in files]
+        rows += [(folder, os.path.basename(path), FOLDER) for path in subfolders]
+        with self._lock:
+            self.misses += 1
+            self._db.execute("DELETE FROM entries WHERE folder = ?", (folder,))
+            self._db.executemany("INSERT INTO entries VALUES (?, ?, ?)", rows)
+            self._db.execute("INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?)",
+                             (folder, result.st_mtime_ns, result.st_ino, listed_at))
+        return files, subfolders
+
+    def hashes(self, path, file_signature):
+        """Returns the cached (partial, digest) of path, (None, None) when unknown or changed."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, partial, digest FROM hashes WHERE path = ?", (path,)
+            ).fetchone()
+        if row is None or tuple(row[:3]) != tuple(file_signature):
+            return None, None
+        return row[3], row[4]
+
+    def store_hashes(self, path, file_signature, partial=None, digest=None):
+        """Remembers the hashes of path; None keeps a hash already stored for the same signature."""
+        cached_partial, cached_digest = self.hashes(path, file_signature)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                             (path, *file_signature, partial or cached_partial, digest or cached_digest))
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
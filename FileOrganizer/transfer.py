@@ -0,0 +1,203 @@
+import ctypes
+import errno
+import os
+import shutil
+import sys
+
+# Bytes handed to the kernel per copy call; progress is reported after each
+CHUNK_SIZE = 64 * 1024 * 1024
+# Buffer of the plain read/write fallback
+BUFFER_SIZE = 1024 * 1024
+# Linux ioctl cloning a whole file (btrfs, XFS, ...) without copying data
+FICLONE = 0x40049409
+# renameat2() arguments: paths relative to the working directory, fail instead of replacing
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+
+# Errors meaning "this copy method does not work here", not "the copy failed"
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF,
+                getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+# Errors of os.link meaning "no hard link possible here" (e.g. FAT, or another user's file)
+_NO_HARD_LINKS = {errno.EPERM, errno.EMLINK, errno.ENOSYS, errno.EOPNOTSUPP, getattr(errno, 'ENOTSUP', errno.EOPNOTSUPP)}
+
+
+def _load_renameat2():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        function = ctypes.CDLL(None, use_errno=True).renameat2  # glibc 2.28+
+    except (OSError, AttributeError):
+        return None
+    function.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    return function
+
+
+_renameat2 = _load_renameat2()
+
+
+def rename_noreplace(source, destination):
+    """Renames source to destination, raising FileExistsError instead of replacing a file already there.
+
+    A plain os.rename silently replaces a destination that appeared after
+    it was checked. The check and the rename are done in one step instead:
+    renameat2(RENAME_NOREPLACE) on Linux, else a hard link to the new name
+    (which fails when it exists) followed by removing the old one. On
+    Windows os.rename never replaces anyway.
+    """
+    if _renameat2 is not None:
+        if _renameat2(AT_FDCWD, os.fsencode(source), AT_FDCWD, os.fsencode(destination), RENAME_NOREPLACE) == 0:
+            return
+        error = ctypes.get_errno()
+        # EINVAL: the filesystem does not support the flag
+        if error not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(error, os.strerror(error), source, None, destination)
+    if os.name == 'nt':
+        os.rename(source, destination)
+        return
+    try:
+        os.link(source, destination, follow_symlinks=False)
+    except OSError as e:
+        if e.errno not in _NO_HARD_LINKS:
+            raise
+        # No hard links here (e.g. FAT): check and rename, the best this filesystem allows
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), destination)
+        os.rename(source, destination)
+        return
+    try:
+        os.remove(source)
+    except OSError:
+        os.remove(destination)
+        raise
+
+
+def _reflink(source_fd, destination_fd):
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        fcntl.ioctl(destination_fd, FICLONE, source_fd)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+    return True
+
+
+def _kernel_copy(copy, source_fd, destination_fd, size, progress):
+    """Copies with os.copy_file_range or os.sendfile.
+
+    Returns the bytes copied, or None when the call does not work here.
+    """
+    copied = 0
+    while copied < size:
+        try:
+            sent = copy(source_fd, destination_fd, copied, min(CHUNK_SIZE, size - copied))
+        except OSError as e:
+            if copied == 0 and e.errno in _UNSUPPORTED:
+                return None
+            raise
+        if sent == 0:
+            if copied == 0:
+                return None  # Some filesystems (procfs, FUSE, NFS) report 0 instead of an error
+            break  # The file shrank while copying
+        copied += sent
+        if progress:
+            progress(copied, size)
+    return copied
+
+
+def _copy_file_range(source_fd, destination_fd, offset, count):
+    return os.copy_file_range(source_fd, destination_fd, count, offset, offset)
+
+
+def _sendfile(source_fd, destination_fd, offset, count):
+    return os.sendfile(destination_fd, source_fd, offset, count)
+
+
+def copy_file(source, destination, progress=None):
+    """Copies the data of source to a new file destination, the cheapest way available.
+
+    Tried in order: a reflink clone (shares the blocks, instant), then
+    os.copy_file_range and os.sendfile (the data stays in the kernel), then
+    plain buffered reads and writes. progress(copied, total) is called with
+    byte counts as the copy goes. Returns (method used, bytes copied).
+    """
+    with open(source, 'rb') as source_file:
+        destination_file = open(destination, 'xb')
+        try:
+            with destination_file:
+                return _copy_data(source_file, destination_file, progress)
+        except BaseException:
+            # Never leave half a copy behind
+            os.remove(destination)
+            raise
+
+
+def _copy_data(source_file, destination_file, progress):
+    source_fd = source_file.fileno()
+    destination_fd = destination_file.fileno()
+    size = os.fstat(source_fd).st_size
+
+    if size and _reflink(source_fd, destination_fd):
+        if progress:
+            progress(size, size)
+        return 'reflink', size
+    if hasattr(os, 'copy_file_range'):
+        copied = _kernel_copy(_copy_file_range, source_fd, destination_fd, size, progress)
+        if copied is not None:
+            return 'copy_file_range', copied
+    if sys.platform.startswith('linux'):
+        copied = _kernel_copy(_sendfile, source_fd, destination_fd, size, progress)
+        if copied is not None:
+            return 'sendfile', copied
+
+    copied = 0
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    while True:
+        read = source_file.readinto(buffer)
+        if not read:
+            break
+        destination_file.write(view[:read])
+        copied += read
+        if progress:
+            progress(copied, size)
+    return 'read/write', copied
+
+
+def transfer(source, destination, progress=None, copy=False):
+    """Moves the file source to destination, never replacing an existing file.
+
+    On the same filesystem this is a single rename_noreplace(), which only
+    touches metadata. Across devices, or always with copy (e.g. to give a
+    hard link its own data again), the data is copied with copy_file()
+    into a newly created file, the metadata copied over and source removed;
+    source is kept when fewer or more bytes than its size were copied (it
+    changed meanwhile, or the filesystem misreported). Symbolic links are
+    moved as links. Raises FileExistsError when destination is taken.
+    Returns destination.
+    """
+    if not copy:
+        try:
+            rename_noreplace(source, destination)
+            return destination
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), destination)  # Fails when destination exists
+        os.remove(source)
+        return destination
+
+    size = os.stat(source).st_size
+    _, copied = copy_file(source, destination, progress)
+    try:
+        if copied != size:
+            raise OSError(errno.EIO, f"copied {copied} of {size} bytes", source)
+        shutil.copystat(source, destination)
+    except OSError:
+        os.remove(destination)  # The source is still intact
+        raise
+    os.remove(source)
+    return destination
@@ -0,0 +1,140 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from flet import Container, ListView, Row, Text, FontWeight, MainAxisAlignment
+
+# Entries shown per folder before a "Show more" row
+PAGE_SIZE = 200
+# Folder listings kept in memory
+CACHE_SIZE = 1024
+
+
+class DirectoryCache:
+    """Sorted (folders, files) listings of directories, reused while a folder's mtime is unchanged.
+
+    Adding, removing or renaming an entry updates the folder's mtime, so a
+    cached listing costs one stat call to validate instead of a rescan.
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._listings = OrderedDict()
+        self._lock = threading.Lock()
+
+    def listing(self, folder):
+        mtime = os.stat(folder).st_mtime_ns
+        with self._lock:
+            cached = self._listings.get(folder)
+            if cached is not None and cached[0] == mtime:
+                self._listings.move_to_end(folder)
+                return cached[1]
+
+        folders, files = [], []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                (folders if entry.is_dir() else files).append(entry.name)
+        result = (sorted(folders, key=str.lower), sorted(files, key=str.lower))
+
+        with self._lock:
+            self._listings[folder] = (mtime, result)
+            self._listings.move_to_end(folder)
+            while len(self._listings) > self.size:
+                self._listings.popitem(last=False)
+        return result
+
+
+class _Node:
+    __slots__ = ('path', 'level', 'expanded')
+
+    def __init__(self, path, level):
+        self.path = path
+        self.level = level
+        self.expanded = False
+
+
+class LazyTreeView:
+    """A folder tree in a ListView that is only built as far as it is expanded.
+
+    A folder's children are listed and turned into rows when the folder is
+    clicked, PAGE_SIZE at a time, and removed again when it is collapsed.
+    """
+
+    def __init__(self, cache=None, page_size=PAGE_SIZE):
+        self.cache = cache or DirectoryCache()
+        self.page_size = page_size
+        self.view = ListView(expand=1, spacing=0)
+
+    def show(self, folder):
+        """Shows the top level of folder; call update() on the page afterwards."""
+        self.view.controls.clear()
+        self.view.controls.extend(self._rows(folder, 0, 0))
+
+    def _rows(self, folder, level, start):
+        try:
+            folders, files = self.cache.listing(folder)
+        except PermissionError:
+            logging.warning(f"Permission denied: {folder}")
+            return []
+        except FileNotFoundError:
+            return []
+
+        entries = [(name, True) for name in folders] + [(name, False) for name in files]
+        end = start + self.page_size
+        rows = [self._row(os.path.join(folder, name), name, is_dir, level) for name, is_dir in entries[start:end]]
+        if end < len(entries):
+            rows.append(Container(
+                content=Text("  " * level + f"… show more ({len(entries) - end} remaining)", italic=True),
+                data=(folder, level, end),
+                on_click=self._show_more,
+            ))
+        return rows
+
+    def _row(self, path, name, is_dir, level):
+        if not is_dir:
+            return Row([Text("  " * level + "📄 " + name)], alignment=MainAxisAlignment.START, data=level)
+        return Container(
+            content=Row([Text(self._folder_label(name, level, False), weight=FontWeight.BOLD)],
+                        alignment=MainAxisAlignment.START),
+            data=_Node(path, level),
+            on_click=self._toggle,
+        )
+
+    @staticmethod
+    def _folder_label(name, level, expanded):
+        return "  " * level + ("▾" if expanded else "▸") + " 📁 " + name
+
+    def _toggle(self, e):
+        row = e.control
+        node = row.data
+        controls = self.view.controls
+        index = controls.index(row) + 1
+        if node.expanded:
+            # Drop every row below this folder that is nested deeper
+            end = index
+            while end < len(controls) and self._level(controls[end]) > node.level:
+                end += 1
+            del controls[index:end]
+        else:
+            controls[index:index] = self._rows(node.path, node.level + 1, 0)
+        node.expanded = not node.expanded
+        row.content.controls[0].value = self._folder_label(os.path.basename(node.path), node.level, node.expanded)
+        self.view.update()
+
+    def _show_more(self, e):
+        folder, level, start = e.control.data
+        controls = self.view.controls
+        index = controls.index(e.control)
+        controls[index:index + 1] = self._rows(folder, level, start)
+        self.view.update()
+
+    @staticmethod
+    def _level(control):
+        # Every row keeps its nesting level in data
+        data = control.data
+        if isinstance(data, _Node):
+            return data.level
+        if isinstance(data, tuple):
+            return data[1]
+        return data
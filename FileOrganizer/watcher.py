@@ -0,0 +1,208 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+# Seconds a new file's size and mtime must stay unchanged before it is filed,
+# when no close event will tell that its writer is done
+SETTLE_TIME = 2.0
+# Seconds before a file that could not be read or moved is tried again
+RETRY_TIME = 30.0
+# Seconds between two directory polls when inotify & co. are unavailable
+POLL_INTERVAL = 1.0
+# Names browsers and downloaders use while a file is still incomplete
+PARTIAL_SUFFIXES = ('.part', '.partial', '.crdownload', '.download', '.tmp')
+
+
+class PathEntry:
+    """Stands in for the os.DirEntry of a file only known by its path."""
+    __slots__ = ('path', 'name')
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+    def stat(self):
+        return os.stat(self.path)
+
+    def is_dir(self):
+        return os.path.isdir(self.path)
+
+    def is_symlink(self):
+        return os.path.islink(self.path)
+
+
+def _signature(path):
+    try:
+        result = os.stat(path)
+    except OSError:
+        return None
+    return result.st_size, result.st_mtime_ns
+
+
+# States of a pending file
+SETTLING, WRITING, DONE = 'settling', 'writing', 'done'
+
+
+class _Arrivals(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_created(self, event):
+        self.watcher.touch(event.src_path, event.is_directory)
+
+    def on_modified(self, event):
+        self.watcher.touch(event.src_path, event.is_directory, WRITING)
+
+    def on_moved(self, event):
+        # Renamed into place once complete, e.g. from a partial download name
+        self.watcher.touch(event.dest_path, event.is_directory, DONE)
+
+    def on_closed(self, event):
+        # Only inotify reports this: the writer is done, no need to wait
+        self.watcher.touch(event.src_path, event.is_directory, DONE)
+
+
+class FolderWatcher:
+    """Hands files arriving in a folder to organize_batch in small batches.
+
+    Filesystem events (inotify, FSEvents, ReadDirectoryChangesW, or polling
+    as a fallback) only mark files as pending; nothing is rescanned. With
+    inotify a file being written is ready once its writer closed it; a file
+    renamed into the folder is ready right away. Files moved in without
+    being written, and every file when there are no close events (other
+    systems, polling), are ready once their size and mtime stayed the same
+    for SETTLE_TIME seconds. All files ready at the same time are passed to
+    organize_batch([PathEntry]) together, on the watcher's own thread.
+    organize_batch may return the paths it failed to move; those, and
+    files that could not be read, are tried again after RETRY_TIME seconds.
+    Sub-folders and partial downloads are ignored. on_stop() is called once
+    the last batch is done after stop().
+    """
+
+    def __init__(self, target_directory, organize_batch, settle_time=SETTLE_TIME, poll=False, initial_entries=(),
+                 on_stop=None):
+        self.target_directory = os.path.abspath(target_directory)
+        self.organize_batch = organize_batch
+        self.on_stop = on_stop
+        self.settle_time = settle_time
+        self.poll = poll
+        self._initial_entries = list(initial_entries)
+        self._pending = {}
+        self._changed = threading.Condition()
+        self._stopped = threading.Event()
+        self._observer = None
+        self._thread = None
+        self._close_events = False
+
+    def start(self):
+        self._observer = self._observe(PollingObserver(timeout=POLL_INTERVAL) if self.poll else Observer())
+        # watchdog reports closed files only through inotify
+        self._close_events = sys.platform.startswith('linux') and not isinstance(self._observer, PollingObserver)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _observe(self, observer):
+        try:
+            observer.schedule(_Arrivals(self), self.target_directory, recursive=False)
+            observer.start()
+            return observer
+        except OSError as e:
+            if isinstance(observer, PollingObserver):
+                raise
+            # E.g. the inotify watch limit is reached, or the share does not support it
+            logging.warning(f"Falling back to polling {self.target_directory}: {e}")
+            return self._observe(PollingObserver(timeout=POLL_INTERVAL))
+
+    def stop(self):
+        self._stopped.set()
+        with self._changed:
+            self._changed.notify()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+        if self.on_stop:
+            self.on_stop()
+
+    def touch(self, path, is_directory, state=SETTLING):
+        """Notes that path was created, written or completed (called by the observer)."""
+        if is_directory or os.path.dirname(path) != self.target_directory or path.lower().endswith(PARTIAL_SUFFIXES):
+            return
+        if state == WRITING and not self._close_events:
+            state = SETTLING  # No close event will come: wait for the file to settle instead
+        signature = _signature(path)
+        with self._changed:
+            if signature is None and not os.path.lexists(path):
+                self._pending.pop(path, None)
+                return
+            previous = self._pending.get(path)
+            if state == SETTLING and previous is not None and previous[2] == WRITING:
+                state = WRITING  # Still open for writing
+            now = time.monotonic()
+            self._pending[path] = (signature, now if state == DONE else now + self.settle_time, state)
+            self._changed.notify()
+
+    def retry(self, path):
+        """Puts path back to be tried again after RETRY_TIME seconds."""
+        with self._changed:
+            self._pending[path] = (_signature(path), time.monotonic() + RETRY_TIME, DONE)
+            self._changed.notify()
+
+    def _ready(self):
+        """Waits for pending files to settle and returns the ready ones."""
+        with self._changed:
+            while not self._stopped.is_set():
+                now = time.monotonic()
+                waiting = [(path, due) for path, (_, due, state) in self._pending.items() if state != WRITING]
+                ready = [path for path, due in waiting if due <= now]
+                if ready:
+                    break
+                self._changed.wait(min(due for _, due in waiting) - now if waiting else None)
+            else:
+                return []
+
+        files = []
+        for path in ready:
+            signature = _signature(path)
+            with self._changed:
+                pending = self._pending.get(path)
+                if pending is None or pending[2] == WRITING or pending[1] > time.monotonic():
+                    continue  # Touched again meanwhile
+                if signature is None:
+                    if os.path.lexists(path):
+                        self._pending[path] = (None, time.monotonic() + RETRY_TIME, pending[2])
+                    else:
+                        del self._pending[path]  # Gone again
+                elif pending[2] == DONE or signature == pending[0]:
+                    del self._pending[path]
+                    files.append(path)
+                else:
+                    # Still changing: wait for it to settle again
+                    self._pending[path] = (signature, time.monotonic() + self.settle_time, SETTLING)
+        return files
+
+    def _run(self):
+        if self._initial_entries:
+            self._organize(self._initial_entries)
+        while not self._stopped.is_set():
+            ready = self._ready()
+            if ready:
+                self._organize([PathEntry(path) for path in ready])
+
+    def _organize(self, entries):
+        try:
+            failed = self.organize_batch(entries) or ()
+        except Exception:
+            logging.exception(f"Could not organize {len(entries)} new files in {self.target_directory}")
+            failed = [entry.path for entry in entries]
+        for path in failed:
+            if os.path.lexists(path):
+                self.retry(path)
@@ -0,0 +1,74 @@
+import numpy as np
+
+TREND_YEARS = 5
+TOP_CATEGORIES = 6
+
+
+def month_number(month, year):
+    """Months since 1970-01, the unit the ledger groups by."""
+    return (year - 1970) * 12 + month - 1
+
+
+def rolling_sum(values, window=12):
+    """Trailing `window`-month sums; NaN until a full window is available."""
+    sums = np.full(len(values), np.nan)
+    if len(values) >= window:
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        sums[window - 1:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+class Trends:
+    """Monthly income/expense series over a range of years, built from one
+    grouped pass over the ledger, with the derived trend figures."""
+
+    def __init__(self, first_year, last_year, income, expenses, category_names, category_expenses):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.income = income
+        self.expenses = expenses
+        self.category_names = category_names
+        self.category_expenses = category_expenses
+
+    @property
+    def net(self):
+        return self.income - self.expenses
+
+    @property
+    def months(self):
+        """(year, month) label of every slot of the series."""
+        return [(year, month) for year in range(self.first_year, self.last_year + 1) for month in range(1, 13)]
+
+    def rolling_12_months(self):
+        """Returns trailing 12-month (income, expenses, net) sums."""
+        return rolling_sum(self.income), rolling_sum(self.expenses), rolling_sum(self.net)
+
+    def yearly_totals(self):
+        """Returns (years, income per year, expenses per year)."""
+        years = np.arange(self.first_year, self.last_year + 1)
+        return years, self.income.reshape(-1, 12).sum(axis=1), self.expenses.reshape(-1, 12).sum(axis=1)
+
+    def year_over_year(self):
+        """Returns (years, expense change in %) against the previous year; NaN where there is no base."""
+        years, _, expenses = self.yearly_totals()
+        change = np.full(len(years), np.nan)
+        previous = expenses[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change[1:] = np.where(previous > 0, (expenses[1:] - previous) / previous * 100, np.nan)
+        return years, change
+
+    def top_categories(self, count=TOP_CATEGORIES):
+        """Returns [(name, monthly expense series)] of the biggest expense categories."""
+        totals = self.category_expenses.sum(axis=0)
+        order = np.argsort(totals)[::-1][:count]
+        return [(self.category_names[i], self.category_expenses[:, i]) for i in order.tolist() if totals[i] > 0]
+
+
+def compute_trends(store, last_year, years=TREND_YEARS, top=TOP_CATEGORIES):
+    """Builds the Trends of the `years` calendar years ending with `last_year`,
+    keeping the expense series of the `top` biggest categories only."""
+    first_year = last_year - years + 1
+    income, expenses, names, category_expenses = store.grouped_totals(
+        month_number(1, first_year), month_number(12, last_year), top
+    )
+    return Trends(first_year, last_year, income, expenses, names, category_expenses)
@@ -0,0 +1,139 @@
+"""Headless benchmarks for the FinanceManager core functions.
+
+Builds synthetic ledgers (1k, 100k and 1M transactions by default, fixed
+seed) and measures wall time and peak traced memory of add_transaction,
+filter_transactions, the monthly totals, the pie chart (ChartService), the PDF
+report and the 5-year trend analytics. No Flet window is opened.
+
+Usage:
+    python benchmarks.py                          # print results
+    python benchmarks.py --save baseline.json     # keep them for later
+    python benchmarks.py --compare baseline.json  # fail on regressions
+"""
+import argparse
+import datetime
+import io
+import json
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+import main
+from analytics import compute_trends
+from charts import ChartService
+from ledger import TransactionStore, EPOCH
+from reports import build_pdf_report
+
+SIZES = (1_000, 100_000, 1_000_000)
+CATEGORIES = ("Rent", "Groceries", "Transport", "Utilities", "Dining", "Health", "Travel", "Gifts")
+YEARS = 5
+REPORT_MONTH, REPORT_YEAR = 6, 2024
+
+
+def synthetic_ledger(size, seed=42):
+    """A ledger of `size` transactions spread over the five years up to 2024."""
+    rng = np.random.default_rng(seed)
+    store = TransactionStore(capacity=size + 1024)
+    first_day = (datetime.date(REPORT_YEAR - YEARS + 1, 1, 1) - EPOCH).days
+    last_day = (datetime.date(REPORT_YEAR, 12, 31) - EPOCH).days
+    types = (rng.random(size) < 0.2).astype(np.int8) ^ 1  # ~20% income
+    descriptions = [CATEGORIES[i] for i in rng.integers(0, len(CATEGORIES), size)]
+    amounts = rng.integers(100, 100_000, size) / 100
+    days = rng.integers(first_day, last_day + 1, size)
+    store.add_columns(types, descriptions, amounts, days)
+    return store
+
+
+def measure(func, repeat):
+    """Returns (median seconds, peak traced bytes) of calling func()."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    # Memory is traced in a separate run so tracing does not skew the timings
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def cases(store):
+    """Yields (name, func, repeat) for every benchmarked path."""
+    def add_transactions():
+        for i in range(1000):
+            main.add_transaction(store, "Expense", CATEGORIES[i % len(CATEGORIES)], 12.5, "2023-12-15")
+
+    def monthly_totals_cold():
+        store._aggregates.invalidate()
+        main.monthly_summary(store, REPORT_MONTH, REPORT_YEAR)
+
+    categories = main.monthly_summary(store, REPORT_MONTH, REPORT_YEAR).categories
+    warm_charts = ChartService(max_workers=1)
+    warm_charts.pie_chart(categories).result()
+    png = warm_charts.pie_chart(categories).result().png
+
+    def pie_chart_cold():
+        charts = ChartService(max_workers=1)
+        charts.pie_chart(categories).result()
+        charts.shutdown()
+
+    def save_pdf_report():
+        build_pdf_report(io.BytesIO(), REPORT_MONTH, REPORT_YEAR, 1000.0, 500.0, png)
+
+    yield "add_transaction x1000", add_transactions, 5
+    yield "filter_transactions", lambda: main.filter_transactions(store, REPORT_MONTH, REPORT_YEAR), 5
+    yield "monthly totals (cold)", monthly_totals_cold, 5
+    yield "monthly totals (cached)", lambda: main.monthly_summary(store, REPORT_MONTH, REPORT_YEAR), 20
+    yield "pie chart (cold)", pie_chart_cold, 3
+    yield "pie chart (cached)", lambda: warm_charts.pie_chart(categories).result(), 20
+    yield "save_pdf_report", save_pdf_report, 5
+    yield "compute_trends (5 years)", lambda: compute_trends(store, REPORT_YEAR), 5
+
+
+def run(sizes):
+    results = {}
+    for size in sizes:
+        store = synthetic_ledger(size)
+        for name, func, repeat in cases(store):
+            seconds, peak = measure(func, repeat)
+            results[f"{name} @ {size:,}"] = {"seconds": seconds, "peak_bytes": peak}
+            print(f"{name:<30} {size:>10,} rows {seconds * 1000:>10.3f} ms {peak / 1024:>10.1f} KiB", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Prints and counts benchmarks that got slower than the baseline by more than `tolerance`."""
+    regressions = 0
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result["seconds"] > before["seconds"] * tolerance:
+            regressions += 1
+            print(f"REGRESSION {name}: {before['seconds'] * 1000:.3f} ms -> {result['seconds'] * 1000:.3f} ms")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against a JSON file written by --save")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor (default 1.5)")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            if compare(results, json.load(file), args.tolerance):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
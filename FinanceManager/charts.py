@@ -0,0 +1,169 @@
+import base64
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+def chart_key(kind, categories):
+    """Cache key of a chart: its kind plus the category totals rounded to cents,
+    so float noise from incremental updates does not cause misses."""
+    return kind, tuple(sorted((label, round(total, 2)) for label, total in categories.items()))
+
+
+def render_pie_chart(categories):
+    """Draws a pie chart of category totals and returns it as PNG bytes.
+
+    Uses a standalone Figure on an Agg canvas instead of pyplot, so it holds
+    no global state and can run on any thread.
+    """
+    figure = Figure(figsize=(6, 6))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.pie(list(categories.values()), labels=list(categories.keys()), autopct='%1.1f%%', startangle=140)
+    axes.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+
+    buf = io.BytesIO()
+    figure.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def trends_digest(trends):
+    """Content hash of a Trends object, used as its chart cache key."""
+    digest = hashlib.sha1(f"{trends.first_year}:{trends.last_year}:{trends.category_names}".encode("utf-8"))
+    for series in (trends.income, trends.expenses, trends.category_expenses):
+        digest.update(series.round(2).tobytes())
+    return digest.hexdigest()
+
+
+def _new_axes(width=8, height=4):
+    figure = Figure(figsize=(width, height))
+    FigureCanvasAgg(figure)
+    return figure, figure.add_subplot()
+
+
+def _to_png(figure):
+    figure.tight_layout()
+    buf = io.BytesIO()
+    figure.savefig(buf, format='png')
+    return buf.getvalue()
+
+
+def _year_ticks(axes, trends):
+    axes.set_xticks(range(0, len(trends.income), 12))
+    axes.set_xticklabels(range(trends.first_year, trends.last_year + 1))
+
+
+def render_trend_chart(trends):
+    """Line chart of monthly income and expenses with the rolling 12-month net."""
+    figure, axes = _new_axes()
+    axes.plot(trends.income, label="Income")
+    axes.plot(trends.expenses, label="Expenses")
+    axes.plot(trends.rolling_12_months()[2] / 12, label="Net (12-month avg)", linestyle="--")
+    _year_ticks(axes, trends)
+    axes.set_title("Monthly trend")
+    axes.legend()
+    return _to_png(figure)
+
+
+def render_yearly_chart(trends):
+    """Bar chart of income and expenses per year, labelled with the year-over-year expense change."""
+    years, income, expenses = trends.yearly_totals()
+    _, change = trends.year_over_year()
+    figure, axes = _new_axes()
+    axes.bar(years - 0.2, income, width=0.4, label="Income")
+    bars = axes.bar(years + 0.2, expenses, width=0.4, label="Expenses")
+    for bar, pct in zip(bars, change):
+        if pct == pct:  # Skip NaN
+            axes.annotate(f"{pct:+.0f}%", (bar.get_x() + bar.get_width() / 2, bar.get_height()),
+                          ha="center", va="bottom", fontsize=8)
+    axes.set_xticks(years)
+    axes.set_title("Year over year")
+    axes.legend()
+    return _to_png(figure)
+
+
+def render_category_chart(trends):
+    """Line chart of the monthly spending of the top expense categories."""
+    figure, axes = _new_axes()
+    for name, series in trends.top_categories():
+        axes.plot(series, label=name)
+    _year_ticks(axes, trends)
+    axes.set_title("Top expense categories")
+    if axes.lines:
+        axes.legend(fontsize=8)
+    return _to_png(figure)
+
+
+TREND_CHARTS = {
+    "trend": render_trend_chart,
+    "yearly": render_yearly_chart,
+    "categories": render_category_chart,
+}
+
+
+class Chart:
+    """A rendered chart, kept both as PNG bytes and base64 for Flet's Image."""
+
+    __slots__ = ("png", "base64")
+
+    def __init__(self, png):
+        self.png = png
+        self.base64 = base64.b64encode(png).decode('utf-8')
+
+
+class ChartService:
+    """Renders charts on a worker pool and memoizes them in an LRU cache.
+
+    Requests for a chart that is already rendering share the same future, and
+    an unchanged report is served straight from the cache.
+    """
+
+    def __init__(self, max_workers=2, cache_size=64):
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chart")
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._pending = {}
+
+    def submit(self, key, render, *args):
+        """Returns a future of the Chart for `key`, rendering it with `render(*args)` if needed."""
+        with self._lock:
+            chart = self._cache.get(key)
+            if chart is not None:
+                self._cache.move_to_end(key)
+                future = Future()
+                future.set_result(chart)
+                return future
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._executor.submit(self._render, key, render, *args)
+            return future
+
+    def _render(self, key, render, *args):
+        try:
+            chart = Chart(render(*args))
+            with self._lock:
+                self._cache[key] = chart
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return chart
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def pie_chart(self, categories):
+        """Returns a future of the pie chart of `categories`."""
+        return self.submit(chart_key("pie", categories), render_pie_chart, dict(categories))
+
+    def trend_charts(self, trends):
+        """Returns {name: future of Chart} for every chart in TREND_CHARTS."""
+        digest = trends_digest(trends)
+        return {name: self.submit((name, digest), render, trends) for name, render in TREND_CHARTS.items()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
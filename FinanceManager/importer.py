@@ -0,0 +1,173 @@
+import csv
+import os
+import re
+
+import numpy as np
+
+from ledger import TYPE_CODES
+
+CHUNK_SIZE = 10_000
+
+# Accepted spellings of the transaction type column
+TYPE_ALIASES = {
+    "income": TYPE_CODES["Income"],
+    "credit": TYPE_CODES["Income"],
+    "expense": TYPE_CODES["Expense"],
+    "debit": TYPE_CODES["Expense"],
+}
+
+OFX_TAG = re.compile(r"<(/?\w+)>([^<\r\n]*)")
+
+
+def _counted(lines, counter):
+    """Passes lines through while counting how many characters were read."""
+    for line in lines:
+        counter[0] += len(line)
+        yield line
+
+
+def _cell(row, column):
+    return row[column] if column is not None and column < len(row) else ""
+
+
+def iter_csv_chunks(file, chunk_size=CHUNK_SIZE):
+    """Yields raw column chunks (types, descriptions, amounts, dates) from a CSV.
+
+    The header must name `amount` and `date` columns; `type` and `description`
+    are optional. Without a type column the sign of the amount decides
+    between income and expense.
+    """
+    reader = csv.reader(file)
+    header = [name.strip().lower() for name in next(reader, [])]
+    try:
+        amount_col, date_col = header.index("amount"), header.index("date")
+    except ValueError:
+        raise ValueError("CSV needs at least 'amount' and 'date' columns.")
+    type_col = header.index("type") if "type" in header else None
+    description_col = header.index("description") if "description" in header else None
+
+    chunk = ([], [], [], [])
+    for row in reader:
+        if not row:
+            continue
+        # Missing cells become empty strings so short rows get rejected later
+        chunk[0].append(_cell(row, type_col) if type_col is not None else None)
+        chunk[1].append(_cell(row, description_col))
+        chunk[2].append(_cell(row, amount_col))
+        chunk[3].append(_cell(row, date_col))
+        if len(chunk[2]) >= chunk_size:
+            yield chunk
+            chunk = ([], [], [], [])
+    if chunk[2]:
+        yield chunk
+
+
+def iter_ofx_chunks(file, chunk_size=CHUNK_SIZE):
+    """Yields raw column chunks from the <STMTTRN> records of an OFX/QFX file.
+
+    Works for both SGML (OFX 1.x, unclosed tags) and XML (OFX 2.x) files.
+    """
+    chunk = ([], [], [], [])
+    record = None
+    for line in file:
+        for tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                record = {}
+            elif tag == "/STMTTRN" and record is not None:
+                posted = record.get("DTPOSTED", "")
+                chunk[0].append(None)
+                chunk[1].append(record.get("NAME") or record.get("MEMO", ""))
+                chunk[2].append(record.get("TRNAMT", ""))
+                chunk[3].append(f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}")
+                record = None
+                if len(chunk[2]) >= chunk_size:
+                    yield chunk
+                    chunk = ([], [], [], [])
+            elif record is not None and not tag.startswith("/"):
+                record[tag] = value.strip()
+    if chunk[2]:
+        yield chunk
+
+
+def _parse_amounts(values):
+    try:
+        return np.asarray(values, dtype=np.str_).astype(np.float64)
+    except ValueError:
+        # Some rows are malformed: fall back to converting them one by one
+        amounts = np.empty(len(values), dtype=np.float64)
+        for i, value in enumerate(values):
+            try:
+                amounts[i] = float(value)
+            except ValueError:
+                amounts[i] = np.nan
+        return amounts
+
+
+def _parse_dates(values):
+    try:
+        return np.asarray(values, dtype="datetime64[D]")
+    except ValueError:
+        dates = np.empty(len(values), dtype="datetime64[D]")
+        for i, value in enumerate(values):
+            try:
+                dates[i] = np.datetime64(value, "D")
+            except ValueError:
+                dates[i] = np.datetime64("NaT")
+        return dates
+
+
+def convert_chunk(types, descriptions, amounts, dates):
+    """Validates and converts a raw chunk in vectorized passes.
+
+    Returns the columns accepted by `add_columns` (type codes, descriptions,
+    amounts, days since 1970-01-01) and the number of rejected rows.
+    """
+    amounts = _parse_amounts(amounts)
+    dates = _parse_dates(dates)
+    valid = np.isfinite(amounts) & ~np.isnat(dates)  # Also rejects inf and overflowing amounts like 1e400
+
+    if all(value is None for value in types):
+        codes = np.where(amounts < 0, TYPE_CODES["Expense"], TYPE_CODES["Income"]).astype(np.int8)
+    else:
+        lowered = np.char.lower(np.char.strip(np.asarray(types, dtype=np.str_)))
+        codes = np.full(len(lowered), -1, dtype=np.int8)
+        for alias, code in TYPE_ALIASES.items():
+            codes[lowered == alias] = code
+        valid &= codes >= 0
+
+    amounts = np.abs(amounts)
+    kept = np.flatnonzero(valid)
+    descriptions = [descriptions[i].strip() for i in kept.tolist()]
+    return (
+        codes[kept],
+        descriptions,
+        amounts[kept],
+        dates[kept].astype(np.int64),
+    ), len(amounts) - len(kept)
+
+
+def import_file(store, path, chunk_size=CHUNK_SIZE, progress_callback=None):
+    """Streams a CSV or OFX/QFX bank export into the ledger chunk by chunk.
+
+    Memory stays bounded by `chunk_size` rows regardless of the file size.
+    `progress_callback` receives the fraction of the file read so far.
+    Returns (imported, rejected) row counts.
+    """
+    total_size = os.path.getsize(path) or 1
+    is_ofx = os.path.splitext(path)[1].lower() in (".ofx", ".qfx")
+    iter_chunks = iter_ofx_chunks if is_ofx else iter_csv_chunks
+
+    imported = rejected = 0
+    read = [0]
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as file:
+        for chunk in iter_chunks(_counted(file, read), chunk_size):
+            columns, bad = convert_chunk(*chunk)
+            store.add_columns(*columns)
+            imported += len(columns[1])
+            rejected += bad
+            if progress_callback:
+                progress_callback(min(read[0] / total_size, 1.0))
+    if progress_callback:
+        progress_callback(1.0)
+    return imported, rejected
@@ -0,0 +1,795 @@
+import datetime
+import functools
+import sqlite3
+import sys
+import threading
+
+import numpy as np
+
+from search import TokenIndex, fts_query, tokenize
+
+TYPES = ("Income", "Expense")
+TYPE_CODES = {name: code for code, name in enumerate(TYPES)}
+# Rank of each type code when sorted by type name, as SQLite sorts the type column
+TYPE_NAME_RANKS = np.argsort(np.argsort(TYPES))
+
+# Columns the transaction table can be sorted by
+SORT_COLUMNS = ("id", "type", "description", "amount", "date")
+
+DATE_FORMAT = "%Y-%m-%d"
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def month_bounds(month, year):
+    """Returns the [start, end) ISO date strings of a calendar month."""
+    start = datetime.date(year, month, 1)
+    end = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+def period_bounds(month, year):
+    """Returns the [start, end) ISO dates of a month, or of a whole year when month is None."""
+    if month is not None:
+        return month_bounds(month, year)
+    return datetime.date(year, 1, 1).isoformat(), datetime.date(year + 1, 1, 1).isoformat()
+
+
+def parse_date(date):
+    """Parses a YYYY-MM-DD string (or date) into a datetime.date."""
+    if isinstance(date, datetime.date):
+        return date
+    return datetime.datetime.strptime(date, DATE_FORMAT).date()
+
+
+def synchronized(method):
+    """Runs a store method while holding the store's lock."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def category_of(type, description):
+    """Report category of a transaction: incomes are grouped together,
+    expenses by their description."""
+    return "Income" if type == "Income" else description
+
+
+class Transaction:
+    """One ledger row as handed out by the stores."""
+
+    __slots__ = ("type", "description", "amount", "date")
+
+    def __init__(self, type, description, amount, date):
+        self.type = type
+        self.description = description
+        self.amount = amount
+        self.date = date
+
+    def __repr__(self):
+        return f"Transaction({self.type!r}, {self.description!r}, {self.amount!r}, {self.date!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return (self.type, self.description, self.amount, self.date) == \
+            (other.type, other.description, other.amount, other.date)
+
+
+class CategoryTable:
+    """Interned descriptions: every distinct description gets a small int id."""
+
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        category_id = self._ids.get(name)
+        if category_id is None:
+            category_id = self._ids[name] = len(self.names)
+            self.names.append(sys.intern(name))
+        return category_id
+
+    def intern_many(self, names):
+        """Returns the ids of `names` as an int32 array, looking each distinct name up once."""
+        if not len(names):
+            return np.empty(0, dtype=np.int32)
+        unique, inverse = np.unique(np.asarray(names, dtype=np.str_), return_inverse=True)
+        ids = np.array([self.intern(name) for name in unique.tolist()], dtype=np.int32)
+        return ids[inverse.reshape(-1)]
+
+    def sort_ranks(self):
+        """Returns an array mapping each category id to its alphabetical rank."""
+        ranks = np.empty(len(self.names), dtype=np.int32)
+        ranks[sorted(range(len(self.names)), key=self.names.__getitem__)] = np.arange(len(self.names))
+        return ranks
+
+
+class MonthSummary:
+    """Totals of one month: income, expenses and per-category sums."""
+
+    __slots__ = ("income", "expenses", "categories", "counts")
+
+    def __init__(self):
+        self.income = 0.0
+        self.expenses = 0.0
+        self.categories = {}
+        self.counts = {}
+
+    @property
+    def balance(self):
+        return self.income - self.expenses
+
+    def copy(self):
+        summary = MonthSummary()
+        summary.income = self.income
+        summary.expenses = self.expenses
+        summary.categories = dict(self.categories)
+        summary.counts = dict(self.counts)
+        return summary
+
+    def apply(self, type, description, amount, sign=1):
+        """Adds (sign=1) or removes (sign=-1) one transaction."""
+        amount *= sign
+        if type == "Income":
+            self.income += amount
+        else:
+            self.expenses += amount
+        category = category_of(type, description)
+        count = self.counts.get(category, 0) + sign
+        if count:
+            self.counts[category] = count
+            self.categories[category] = self.categories.get(category, 0.0) + amount
+        else:
+            # Drop emptied categories instead of keeping a 0.00 slice around
+            self.counts.pop(category, None)
+            self.categories.pop(category, None)
+
+
+class MonthlyAggregates:
+    """Cache of MonthSummary objects keyed by (year, month).
+
+    Months are computed on first use by the store and then kept current by
+    `add`/`remove`, so a report never rescans the month's transactions.
+    """
+
+    def __init__(self, load):
+        self._load = load
+        self._months = {}
+
+    def get(self, month, year):
+        summary = self._months.get((year, month))
+        if summary is None:
+            summary = self._months[(year, month)] = self._load(month, year)
+        return summary
+
+    def add(self, date, type, description, amount):
+        summary = self._months.get((date.year, date.month))
+        if summary is not None:
+            summary.apply(type, description, amount)
+
+    def remove(self, date, type, description, amount):
+        summary = self._months.get((date.year, date.month))
+        if summary is not None:
+            summary.apply(type, description, amount, sign=-1)
+
+    def invalidate(self, keys=None):
+        """Forgets the given (year, month) keys, or every month."""
+        if keys is None:
+            self._months.clear()
+        for key in keys or ():
+            self._months.pop(key, None)
+
+
+class TransactionStore:
+    """Columnar in-memory ledger with a (year, month) index.
+
+    Every public method holds the store's lock, so one ledger can be shared
+    by several threads (e.g. concurrent Flet event handlers).
+
+    Amounts, types, dates and descriptions live in typed NumPy columns (dates
+    as days since 1970-01-01, descriptions as ids into an interned category
+    table), so nothing is re-parsed when reports filter the ledger and
+    grouping by category is a bincount. Each row gets a stable id; deleting a
+    row only clears its ``alive`` flag and removes it from the month index.
+    """
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._types = np.empty(capacity, dtype=np.int8)
+        self._amounts = np.empty(capacity, dtype=np.float64)
+        self._days = np.empty(capacity, dtype=np.int32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._categories = np.empty(capacity, dtype=np.int32)
+        self.categories = CategoryTable()
+        # Word index over the descriptions that still have rows, and those row counts
+        self._search = TokenIndex()
+        self._category_rows = np.zeros(0, dtype=np.int64)
+        # (year, month) -> {txn_id: None}, used as an insertion-ordered set
+        self._months = {}
+        self._count = 0
+        # Bumped on every change so cached query orderings can be reused until then
+        self._version = 0
+        self._last_query = (None, None)
+        self._aggregates = MonthlyAggregates(self._load_summary)
+        self._lock = threading.RLock()
+
+    def close(self):
+        pass
+
+    @synchronized
+    def __len__(self):
+        return self._count
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._amounts)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ("_types", "_amounts", "_days", "_alive", "_categories"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _count_category_rows(self, category_ids, sign=1):
+        # Adds a description to the search index with its first row, drops it with its last
+        if len(self._category_rows) < len(self.categories):
+            missing = len(self.categories) - len(self._category_rows)
+            self._category_rows = np.concatenate((self._category_rows, np.zeros(missing, dtype=np.int64)))
+        if np.isscalar(category_ids):
+            before = self._category_rows[category_ids]
+            self._category_rows[category_ids] += sign
+            changed = [category_ids] if before == 0 or before + sign == 0 else []
+        else:
+            delta = np.bincount(category_ids, minlength=len(self._category_rows))
+            changed = np.flatnonzero((self._category_rows == 0) & (delta > 0)).tolist()
+            self._category_rows += delta
+        for category_id in changed:
+            if self._category_rows[category_id] > 0:
+                self._search.add(category_id, self.categories.names[category_id])
+            else:
+                self._search.remove(category_id, self.categories.names[category_id])
+
+    @synchronized
+    def add(self, type, description, amount, date):
+        date = parse_date(date)
+        self._reserve(1)
+        txn_id = self._size
+        self._types[txn_id] = TYPE_CODES[type]
+        self._amounts[txn_id] = float(amount)
+        self._days[txn_id] = (date - EPOCH).days
+        self._alive[txn_id] = True
+        self._categories[txn_id] = self.categories.intern(description)
+        self._count_category_rows(int(self._categories[txn_id]))
+        self._months.setdefault((date.year, date.month), {})[txn_id] = None
+        self._aggregates.add(date, type, description, float(amount))
+        self._size += 1
+        self._count += 1
+        self._version += 1
+        return txn_id
+
+    @synchronized
+    def add_many(self, rows):
+        """Adds (type, description, amount, date) tuples; returns their ids."""
+        return [self.add(*row) for row in rows]
+
+    @synchronized
+    def add_columns(self, types, descriptions, amounts, days):
+        """Appends a batch given as columns: type codes, descriptions, amounts
+        and days since 1970-01-01. Returns the range of new ids."""
+        count = len(descriptions)
+        self._reserve(count)
+        start, end = self._size, self._size + count
+        self._types[start:end] = types
+        self._amounts[start:end] = amounts
+        self._days[start:end] = days
+        self._alive[start:end] = True
+        self._categories[start:end] = self.categories.intern_many(descriptions)
+        self._count_category_rows(self._categories[start:end])
+
+        # Index the batch one month at a time instead of one row at a time
+        months = np.asarray(days, dtype="datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        order = np.argsort(months, kind="stable")
+        keys, first = np.unique(months[order], return_index=True)
+        touched = []
+        for key, ids in zip(keys.tolist(), np.split(order + start, first[1:])):
+            year, month = divmod(key, 12)
+            touched.append((year + 1970, month + 1))
+            self._months.setdefault(touched[-1], {}).update(dict.fromkeys(ids.tolist()))
+        # Cheaper to recompute the touched months on demand than to apply a whole batch row by row
+        self._aggregates.invalidate(touched)
+
+        self._size = end
+        self._count += count
+        self._version += 1
+        return range(start, end)
+
+    @synchronized
+    def delete(self, txn_id):
+        if not (0 <= txn_id < self._size) or not self._alive[txn_id]:
+            raise KeyError(txn_id)
+        date = EPOCH + datetime.timedelta(days=int(self._days[txn_id]))
+        month = self._months[(date.year, date.month)]
+        del month[txn_id]
+        if not month:
+            del self._months[(date.year, date.month)]
+        self._alive[txn_id] = False
+        self._count_category_rows(int(self._categories[txn_id]), sign=-1)
+        self._aggregates.remove(
+            date, TYPES[self._types[txn_id]], self.categories.names[self._categories[txn_id]],
+            float(self._amounts[txn_id]),
+        )
+        self._count -= 1
+        self._version += 1
+
+    def _records(self, ids):
+        # Builds Transaction objects for many rows with one vectorized pass per column
+        ids = np.asarray(ids, dtype=np.intp)
+        names = self.categories.names
+        dates = np.datetime_as_string(self._days[ids].astype("datetime64[D]")).tolist()
+        return [
+            Transaction(TYPES[type], names[category], amount, date)
+            for type, category, amount, date in zip(
+                self._types[ids].tolist(), self._categories[ids].tolist(), self._amounts[ids].tolist(), dates
+            )
+        ]
+
+    @synchronized
+    def get(self, txn_id):
+        if not (0 <= txn_id < self._size) or not self._alive[txn_id]:
+            raise KeyError(txn_id)
+        return self._records([txn_id])[0]
+
+    def items(self):
+        """Yields (txn_id, transaction) pairs in insertion order."""
+        with self._lock:
+            ids = np.flatnonzero(self._alive[:self._size]).tolist()
+        for txn_id in ids:
+            try:
+                yield txn_id, self.get(txn_id)
+            except KeyError:
+                continue  # Deleted by another thread meanwhile
+
+    def __iter__(self):
+        for _, txn in self.items():
+            yield txn
+
+    @synchronized
+    def month_ids(self, month, year):
+        return list(self._months.get((year, month), ()))
+
+    @synchronized
+    def filter(self, month, year):
+        return self._records(self.month_ids(month, year))
+
+    def _period_ids(self, month, year):
+        if year is None:
+            return np.flatnonzero(self._alive[:self._size])
+        if month is not None:
+            ids = np.fromiter(self._months.get((year, month), ()), dtype=np.intp)
+        else:
+            ids = np.fromiter(
+                (txn_id for m in range(1, 13) for txn_id in self._months.get((year, m), ())), dtype=np.intp
+            )
+        ids.sort()
+        return ids
+
+    def _matching_ids(self, month, year, text, min_amount, max_amount, start_date, end_date):
+        ids = self._period_ids(month, year)
+        if start_date is not None:
+            ids = ids[self._days[ids] >= (parse_date(start_date) - EPOCH).days]
+        if end_date is not None:
+            ids = ids[self._days[ids] <= (parse_date(end_date) - EPOCH).days]
+        if min_amount is not None:
+            ids = ids[self._amounts[ids] >= min_amount]
+        if max_amount is not None:
+            ids = ids[self._amounts[ids] <= max_amount]
+        if text and tokenize(text):
+            # The word index resolves the text to description ids; rows are then matched by id
+            matches = np.fromiter(self._search.search(text), dtype=np.int32)
+            ids = ids[np.isin(self._categories[ids], matches)]
+        return ids
+
+    @synchronized
+    def query(self, offset=0, limit=50, sort_by="id", descending=False, month=None, year=None,
+              text=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+        """Returns (total, [(txn_id, transaction), ...]) for one window of the
+        optionally filtered and sorted ledger.
+
+        Besides a month or year, rows can be filtered by words of their
+        description (each word matched as a prefix), an amount range and an
+        inclusive date range. The sorted id order is cached until the ledger
+        changes, so paging through the same view only costs the rows of the
+        window.
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(sort_by)
+        filters = (month, year, text, min_amount, max_amount, start_date, end_date)
+        key = (self._version, sort_by, descending) + filters
+        if self._last_query[0] != key:
+            ids = self._matching_ids(*filters)
+            if sort_by == "description":
+                ids = ids[np.argsort(self.categories.sort_ranks()[self._categories[ids]], kind="stable")]
+            elif sort_by == "type":
+                ids = ids[np.argsort(TYPE_NAME_RANKS[self._types[ids]], kind="stable")]
+            elif sort_by != "id":
+                column = {"amount": self._amounts, "date": self._days}[sort_by]
+                ids = ids[np.argsort(column[ids], kind="stable")]
+            if descending:
+                ids = ids[::-1]
+            self._last_query = (key, ids)
+        ids = self._last_query[1]
+        window = ids[offset:offset + limit]
+        return len(ids), list(zip(window.tolist(), self._records(window)))
+
+    def _load_summary(self, month, year):
+        summary = MonthSummary()
+        ids = np.fromiter(self._months.get((year, month), ()), dtype=np.intp)
+        income = self._types[ids] == TYPE_CODES["Income"]
+        amounts = self._amounts[ids]
+        summary.income = float(amounts[income].sum())
+        summary.expenses = float(amounts[~income].sum())
+        if income.any():
+            summary.categories["Income"] = summary.income
+            summary.counts["Income"] = int(income.sum())
+
+        # Expenses are grouped by category id in one bincount instead of hashing descriptions
+        expense_categories = self._categories[ids][~income]
+        totals = np.bincount(expense_categories, weights=amounts[~income], minlength=len(self.categories))
+        counts = np.bincount(expense_categories, minlength=len(self.categories))
+        for category_id in np.flatnonzero(counts).tolist():
+            name = self.categories.names[category_id]
+            summary.categories[name] = summary.categories.get(name, 0.0) + float(totals[category_id])
+            summary.counts[name] = summary.counts.get(name, 0) + int(counts[category_id])
+        return summary
+
+    @synchronized
+    def monthly_summary(self, month, year):
+        """Returns a snapshot of the cached MonthSummary of a month."""
+        return self._aggregates.get(month, year).copy()
+
+    @synchronized
+    def grouped_totals(self, first_month, last_month, top=None):
+        """Groups the ledger by month between two month numbers (months since
+        1970-01, inclusive) in one vectorized pass.
+
+        Returns (income, expenses, category_names, category_expenses): per-month
+        income and expense arrays plus a months x categories matrix of expenses.
+        Only categories with expenses in the range get a column, biggest total
+        first; with `top`, only that many of them.
+        """
+        months = last_month - first_month + 1
+        bounds = np.array([first_month, last_month + 1], dtype="datetime64[M]")
+        first_day, end_day = bounds.astype("datetime64[D]").astype(np.int32)
+        days = self._days[:self._size]
+        rows = np.flatnonzero(self._alive[:self._size] & (days >= first_day) & (days < end_day))
+        slot = days[rows].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64) - first_month
+        amounts = self._amounts[rows]
+        income = self._types[rows] == TYPE_CODES["Income"]
+
+        # Rank the categories seen in the range first, so the matrix only has the columns kept
+        category_ids, inverse = np.unique(self._categories[rows][~income], return_inverse=True)
+        ranked = np.argsort(-np.bincount(inverse, weights=amounts[~income]), kind="stable")[:top]
+        columns = np.full(len(category_ids), -1)
+        columns[ranked] = np.arange(len(ranked))
+        column = columns[inverse]
+        kept = column >= 0
+        cells = slot[~income][kept] * len(ranked) + column[kept]
+        category_expenses = np.bincount(
+            cells, weights=amounts[~income][kept], minlength=months * len(ranked)
+        ).reshape(months, len(ranked))
+        names = self.categories.names
+        return (
+            np.bincount(slot[income], weights=amounts[income], minlength=months),
+            np.bincount(slot[~income], weights=amounts[~income], minlength=months),
+            [names[category_id] for category_id in category_ids[ranked].tolist()],
+            category_expenses,
+        )
+
+    @synchronized
+    def monthly_totals(self, month, year):
+        """Returns (total_income, total_expenses) for a month."""
+        summary = self.monthly_summary(month, year)
+        return summary.income, summary.expenses
+
+
+class SqliteTransactionStore:
+    """On-disk ledger backed by SQLite in WAL mode.
+
+    Exposes the same interface as TransactionStore. Dates are stored as ISO
+    strings so month filters and totals are range scans over the date index.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY,
+            type TEXT NOT NULL,
+            description TEXT NOT NULL,
+            amount REAL NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_type_date ON transactions(type, date);
+    """
+
+    # Full-text index over descriptions, kept in sync by triggers
+    SEARCH_SCHEMA = """
+        CREATE VIRTUAL TABLE transactions_fts USING fts5(
+            description, content='transactions', content_rowid='id'
+        );
+        CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts(rowid, description) VALUES (new.id, new.description);
+        END;
+        CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, description)
+            VALUES ('delete', old.id, old.description);
+        END;
+        INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild');
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        has_search = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'"
+        ).fetchone()
+        if not has_search:
+            # Also indexes the rows of ledgers created before search existed
+            self._conn.executescript(self.SEARCH_SCHEMA)
+        self._aggregates = MonthlyAggregates(self._load_summary)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    @staticmethod
+    def _row(type, description, amount, date):
+        if type not in TYPE_CODES:
+            raise KeyError(type)
+        return type, description, float(amount), parse_date(date).isoformat()
+
+    @staticmethod
+    def _record(row):
+        return Transaction(row[0], sys.intern(row[1]), row[2], row[3])
+
+    def add(self, type, description, amount, date):
+        row = self._row(type, description, amount, date)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO transactions (type, description, amount, date) VALUES (?, ?, ?, ?)", row
+            )
+            self._aggregates.add(parse_date(row[3]), *row[:3])
+        return cursor.lastrowid
+
+    def add_many(self, rows):
+        """Inserts all rows in a single transaction; returns their ids."""
+        return self._insert([self._row(*row) for row in rows])
+
+    def _insert(self, rows):
+        if not rows:
+            return []
+        with self._lock, self._conn:
+            first = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM transactions").fetchone()[0]
+            self._conn.executemany(
+                "INSERT INTO transactions (type, description, amount, date) VALUES (?, ?, ?, ?)", rows
+            )
+            self._aggregates.invalidate({(int(row[3][:4]), int(row[3][5:7])) for row in rows})
+        return list(range(first, first + len(rows)))
+
+    def add_columns(self, types, descriptions, amounts, days):
+        """Columnar bulk insert, see TransactionStore.add_columns."""
+        dates = np.asarray(days, dtype="datetime64[D]").astype(str).tolist()
+        type_names = [TYPES[code] for code in np.asarray(types).tolist()]
+        return self._insert(list(zip(type_names, descriptions, np.asarray(amounts).tolist(), dates)))
+
+    def delete(self, txn_id):
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT type, description, amount, date FROM transactions WHERE id = ?", (txn_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(txn_id)
+            self._conn.execute("DELETE FROM transactions WHERE id = ?", (txn_id,))
+            self._aggregates.remove(parse_date(row[3]), *row[:3])
+
+    def get(self, txn_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT type, description, amount, date FROM transactions WHERE id = ?", (txn_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(txn_id)
+        return self._record(row)
+
+    def items(self):
+        """Yields (txn_id, transaction) pairs in insertion order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, type, description, amount, date FROM transactions ORDER BY id"
+            ).fetchall()
+        for row in rows:
+            yield row[0], self._record(row[1:])
+
+    def __iter__(self):
+        for _, txn in self.items():
+            yield txn
+
+    def month_ids(self, month, year):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM transactions WHERE date >= ? AND date < ? ORDER BY id",
+                month_bounds(month, year),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def filter(self, month, year):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT type, description, amount, date FROM transactions "
+                "WHERE date >= ? AND date < ? ORDER BY id",
+                month_bounds(month, year),
+            ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def query(self, offset=0, limit=50, sort_by="id", descending=False, month=None, year=None,
+              text=None, min_amount=None, max_amount=None, start_date=None, end_date=None):
+        """Returns (total, [(txn_id, transaction), ...]), see TransactionStore.query.
+        Text search goes through the FTS5 index."""
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(sort_by)
+        conditions, params = [], []
+        if year is not None:
+            conditions.append("date >= ? AND date < ?")
+            params.extend(period_bounds(month, year))
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(parse_date(start_date).isoformat())
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(parse_date(end_date).isoformat())
+        if min_amount is not None:
+            conditions.append("amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("amount <= ?")
+            params.append(max_amount)
+        if text and fts_query(text):
+            conditions.append("id IN (SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?)")
+            params.append(fts_query(text))
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        params = tuple(params)
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM transactions {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, type, description, amount, date FROM transactions {where} "
+                f"ORDER BY {sort_by} {direction}, id {direction} LIMIT ? OFFSET ?",
+                params + (limit, offset),
+            ).fetchall()
+        return total, [(row[0], self._record(row[1:])) for row in rows]
+
+    def _load_summary(self, month, year):
+        # Called with the lock held; one indexed GROUP BY seeds the whole month
+        summary = MonthSummary()
+        rows = self._conn.execute(
+            "SELECT type, CASE WHEN type = 'Income' THEN 'Income' ELSE description END, "
+            "SUM(amount), COUNT(*) FROM transactions "
+            "WHERE date >= ? AND date < ? GROUP BY 1, 2",
+            month_bounds(month, year),
+        ).fetchall()
+        for type, category, total, count in rows:
+            if type == "Income":
+                summary.income += total
+            else:
+                summary.expenses += total
+            summary.categories[category] = summary.categories.get(category, 0.0) + total
+            summary.counts[category] = summary.counts.get(category, 0) + count
+        return summary
+
+    def monthly_summary(self, month, year):
+        """Returns a snapshot of the cached MonthSummary of a month."""
+        with self._lock:
+            return self._aggregates.get(month, year).copy()
+
+    def grouped_totals(self, first_month, last_month, top=None):
+        """Per-month totals, see TransactionStore.grouped_totals. The grouping
+        itself runs in SQLite over the date index."""
+        months = last_month - first_month + 1
+        first_year, first = divmod(first_month, 12)
+        last_year, last = divmod(last_month + 1, 12)
+        bounds = (
+            datetime.date(first_year + 1970, first + 1, 1).isoformat(),
+            datetime.date(last_year + 1970, last + 1, 1).isoformat(),
+        )
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CAST(substr(date, 1, 4) AS INTEGER) * 12 + CAST(substr(date, 6, 2) AS INTEGER) - 1, "
+                "type, description, SUM(amount) FROM transactions "
+                "WHERE date >= ? AND date < ? GROUP BY 1, 2, 3",
+                bounds,
+            ).fetchall()
+
+        income = np.zeros(months)
+        expenses = np.zeros(months)
+        totals, cells = {}, []
+        for month, type, description, total in rows:
+            slot = month - 1970 * 12 - first_month
+            if type == "Income":
+                income[slot] += total
+                continue
+            expenses[slot] += total
+            totals[description] = totals.get(description, 0.0) + total
+            cells.append((slot, description, total))
+        names = sorted(totals, key=totals.get, reverse=True)[:top]
+        columns = {name: column for column, name in enumerate(names)}
+        category_expenses = np.zeros((months, len(names)))
+        for slot, description, total in cells:
+            column = columns.get(description)
+            if column is not None:
+                category_expenses[slot, column] += total
+        return income, expenses, names, category_expenses
+
+    def monthly_totals(self, month, year):
+        """Returns (total_income, total_expenses) for a month."""
+        summary = self.monthly_summary(month, year)
+        return summary.income, summary.expenses
+
+
+def migrate_to_sqlite(store, path):
+    """Copies every transaction of an in-memory store into a SQLite ledger."""
+    target = SqliteTransactionStore(path)
+    target.add_many(
+        (txn.type, txn.description, txn.amount, txn.date) for txn in store
+    )
+    return target
+
+
+class LedgerRegistry:
+    """Hands out one ledger per key (a browser session, or one shared key).
+
+    Ledgers are created on first `acquire` with `factory(key)` and reference
+    counted, so every session acquiring the same key shares one ledger and it
+    is closed once the last of them releases it.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._ledgers = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ledgers)
+
+    def acquire(self, key):
+        with self._lock:
+            entry = self._ledgers.get(key)
+            if entry is None:
+                entry = self._ledgers[key] = [self._factory(key), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, key):
+        with self._lock:
+            entry = self._ledgers.get(key)
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self._ledgers[key]
+        entry[0].close()
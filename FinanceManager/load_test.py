@@ -0,0 +1,111 @@
+"""Concurrent session load test for the FinanceManager ledgers.
+
+Simulates many browser sessions hitting the app at once, without a Flet
+window, and checks that:
+
+- every session only ever sees its own transactions, and
+- sessions sharing one ledger (several tabs of one user) do not lose writes.
+
+Usage: python load_test.py [--sessions 200] [--transactions 500]
+"""
+import argparse
+import random
+import threading
+import time
+
+import main
+from ledger import LedgerRegistry, TYPES
+
+
+def run_session(registry, key, count, seed, errors):
+    rng = random.Random(seed)
+    ledger = registry.acquire(key)
+    try:
+        income = expenses = 0.0
+        ids = []
+        for _ in range(count):
+            type = rng.choice(TYPES)
+            amount = rng.randint(1, 10_000) / 100
+            ids.append((main.add_transaction(ledger, type, key, amount, "2024-06-15"), type, amount))
+            if type == "Income":
+                income += amount
+            else:
+                expenses += amount
+
+        # Delete every tenth transaction again
+        for txn_id, type, amount in ids[::10]:
+            main.delete_transaction(ledger, txn_id)
+            if type == "Income":
+                income -= amount
+            else:
+                expenses -= amount
+
+        ledger.query(limit=25, sort_by="amount", descending=True)
+        summary = main.monthly_summary(ledger, 6, 2024)
+        foreign = [txn for txn in main.filter_transactions(ledger, 6, 2024) if txn.description != key]
+        if foreign:
+            errors.append(f"{key} sees {len(foreign)} transactions of other sessions")
+        if round(summary.income, 2) != round(income, 2) or round(summary.expenses, 2) != round(expenses, 2):
+            errors.append(f"{key} totals are off: {summary.income:.2f}/{summary.expenses:.2f}")
+    finally:
+        registry.release(key)
+
+
+def run_shared_ledger(registry, tabs, count, errors):
+    """Many tabs of one user appending to the same ledger at once."""
+    ledger = registry.acquire(main.SHARED_LEDGER_KEY)
+    try:
+        def append():
+            for _ in range(count):
+                main.add_transaction(ledger, "Expense", "shared", 1, "2024-06-15")
+
+        threads = [threading.Thread(target=append) for _ in range(tabs)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if len(ledger) != tabs * count:
+            errors.append(f"shared ledger holds {len(ledger)} transactions, expected {tabs * count}")
+        if main.monthly_summary(ledger, 6, 2024).expenses != tabs * count:
+            errors.append("shared ledger totals are off")
+    finally:
+        registry.release(main.SHARED_LEDGER_KEY)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--transactions", type=int, default=500, help="transactions added per session")
+    args = parser.parse_args()
+
+    registry = LedgerRegistry(main.open_ledger)
+    errors = []
+
+    threads = [
+        threading.Thread(target=run_session, args=(registry, f"session:{i}", args.transactions, i, errors))
+        for i in range(args.sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    operations = args.sessions * (args.transactions + args.transactions // 10 + 4)
+    print(f"{args.sessions} isolated sessions: {elapsed:.2f}s, {operations / elapsed:,.0f} ledger ops/s")
+
+    start = time.perf_counter()
+    run_shared_ledger(registry, args.sessions, args.transactions // 10, errors)
+    elapsed = time.perf_counter() - start
+    print(f"{args.sessions} tabs on one ledger: {elapsed:.2f}s")
+
+    if len(registry):
+        errors.append(f"{len(registry)} ledgers were not released")
+    for error in errors:
+        print("FAIL:", error)
+    print("OK" if not errors else f"{len(errors)} failures")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -7,76 +7,72 @@ from flet import (
     ElevatedButton,
     Column,
     Row,
-    DataTable,
-    DataColumn,
-    DataRow,
-    DataCell,
     AlertDialog,
-    Image
+    Image,
+    FilePicker,
+    FilePickerResultEvent,
+    ProgressBar,
+    ProgressRing,
 )
-import matplotlib
-from reportlab.lib import pagesizes
-from reportlab.pdfgen import canvas
-
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import datetime
-import io
-import base64
+import os
 
 from flet_core import dropdown, TextThemeStyle, MainAxisAlignment, icons, TextButton, colors, FontWeight, \
-    Container, border, Alignment, TextAlign, BorderSide, Icon, IconButton, ThemeMode
+    Container, border, Alignment, TextAlign, BorderSide, Icon, IconButton, ThemeMode, ScrollMode
+
+from ledger import TransactionStore, SqliteTransactionStore, LedgerRegistry
+from importer import import_file
+from transaction_table import TransactionTable
+from charts import ChartService, TREND_CHARTS
+from analytics import compute_trends
+from reports import build_pdf_report, export_reports, month_range, report_filename
+
+# Storage for transactions:
+# - FINANCE_DB: a single SQLite file, meant for the single-user desktop app; every
+#   session shares the one store on it, so its cached monthly totals stay correct
+# - otherwise: one in-memory ledger per browser session, dropped when it closes
+FINANCE_DB = os.getenv("FINANCE_DB")
+SHARED_LEDGER_KEY = "shared"
+
+
+def open_ledger(key):
+    if FINANCE_DB:
+        return SqliteTransactionStore(FINANCE_DB)
+    return TransactionStore()
+
+
+ledgers = LedgerRegistry(open_ledger)
+
+
+# Function to pick the ledger key of a page: the shared SQLite ledger if any, else the session
+def ledger_key(page):
+    if FINANCE_DB:
+        return SHARED_LEDGER_KEY
+    return f"session:{page.session_id}"
+
 
-# In-memory storage for transactions
-transactions = []
+# Charts are shared by all sessions: they are read-only and cached by their category totals
+chart_service = ChartService()
 
 # Function to add a transaction
-def add_transaction(type, description, amount, date):
-    transactions.append({
-        "type": type,
-        "description": description,
-        "amount": float(amount),
-        "date": date
-    })
+def add_transaction(ledger, type, description, amount, date):
+    return ledger.add(type, description, amount, date)
+
+
+# Function to delete a transaction by its id
+def delete_transaction(ledger, txn_id):
+    ledger.delete(txn_id)
 
 
 # Function to filter transactions by month and year
-def filter_transactions(month, year):
-    filtered = []
-    for txn in transactions:
-        txn_date = datetime.datetime.strptime(txn["date"], "%Y-%m-%d")
-        if txn_date.month == month and txn_date.year == year:
-            filtered.append(txn)
-    return filtered
-
-
-# Function to generate a pie chart
-def generate_pie_chart(filtered_txns):
-    if not filtered_txns:
-        return None
-
-    categories = {}
-    for txn in filtered_txns:
-        if txn["type"] == "Income":
-            category = "Income"
-        else:
-            category = txn["description"]
-        categories[category] = categories.get(category, 0) + txn["amount"]
+def filter_transactions(ledger, month, year):
+    return ledger.filter(month, year)
 
-    labels = categories.keys()
-    sizes = categories.values()
 
-    plt.figure(figsize=(6, 6))
-    plt.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=140)
-    plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
+# Function to get the cached income/expense/category totals of a month
+def monthly_summary(ledger, month, year):
+    return ledger.monthly_summary(month, year)
 
-    # Save plot to a bytes buffer
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    image_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    return image_base64
 
 # Main Flet application
 def main(page: Page):
@@ -86,6 +82,11 @@ def main(page: Page):
     page.window.height = 700
     page.padding = 20
 
+    # This session's own ledger; nothing below touches another session's data
+    session_key = ledger_key(page)
+    transactions = ledgers.acquire(session_key)
+    page.on_close = lambda e: ledgers.release(session_key)
+
     # Input fields
     type_dropdown = Dropdown(
         label="Type",
@@ -101,18 +102,13 @@ def main(page: Page):
     amount_field = TextField(label="Amount", width=200, value="")
     date_field = TextField(label="Date (YYYY-MM-DD)", width=200, value=datetime.date.today().isoformat())
     add_btn = ElevatedButton("Add Transaction", icon=icons.ADD_ROUNDED)
+    import_btn = ElevatedButton("Import CSV/OFX", icon=icons.UPLOAD_FILE)
+    import_progress = ProgressBar(width=200, visible=False)
+    import_picker = FilePicker(on_result=lambda e: on_import_file_selected(e))
+    page.overlay.append(import_picker)
 
-    # Table to display transactions
-    txn_table = DataTable(
-        columns=[
-            DataColumn(Text("Type")),
-            DataColumn(Text("Description")),
-            DataColumn(Text("Amount")),
-            DataColumn(Text("Date")),
-            DataColumn(Text("Delete"))
-        ],
-        rows=[]
-    )
+    # Table to display transactions, one page at a time
+    txn_table = TransactionTable(transactions, on_delete=lambda txn_id: on_delete_click(txn_id))
 
     # Report section
     report_month_field = TextField(label="Month (1-12)", width=100, value=str(datetime.date.today().month))
@@ -121,26 +117,14 @@ def main(page: Page):
     report_output = Column()
 
     # Function to delete a transaction
-    def delete_transaction(index):
-        transactions.pop(index)
+    def on_delete_click(txn_id):
+        delete_transaction(transactions, txn_id)
         refresh_table()
         page.update()
 
-    # Function to refresh the transaction table
+    # Function to refresh the visible page of the transaction table
     def refresh_table():
-        txn_table.rows = [
-            DataRow(cells=[
-                DataCell(Text(txn["type"])),
-                DataCell(Text(txn["description"])),
-                DataCell(Text(f"${txn['amount']:.2f}")),
-                DataCell(Text(txn["date"])),
-                DataCell(IconButton(  # Add a delete button
-                    icon=icons.CLOSE,
-                    icon_color=colors.RED,
-                    on_click=lambda e, i=index: delete_transaction(i)
-                ))
-            ]) for index, txn in enumerate(transactions)
-        ]
+        txn_table.refresh()
         page.update()
 
     # Event handler for adding a transaction
@@ -178,7 +162,7 @@ def main(page: Page):
             page.update()
             return
 
-        add_transaction(type, description, amount, date)
+        add_transaction(transactions, type, description, amount, date)
         refresh_table()
 
         # Clear input fields
@@ -189,6 +173,46 @@ def main(page: Page):
 
     add_btn.on_click = on_add_click
 
+    # Event handler for bulk importing a bank export
+    def on_import_file_selected(e: FilePickerResultEvent):
+        if not e.files:
+            return
+
+        import_btn.disabled = True
+        import_progress.value = 0
+        import_progress.visible = True
+        page.update()
+
+        def update_progress(fraction):
+            import_progress.value = fraction
+            import_progress.update()
+
+        try:
+            imported, rejected = import_file(transactions, e.files[0].path, progress_callback=update_progress)
+            message = f"Imported {imported} transactions."
+            if rejected:
+                message += f" Skipped {rejected} invalid rows."
+        except (OSError, ValueError) as ex:
+            message = f"Import failed: {ex}"
+
+        # Refresh the table once for the whole file rather than per row
+        refresh_table()
+        import_btn.disabled = False
+        import_progress.visible = False
+        dialog = AlertDialog(
+            title=Text("Import"),
+            content=Text(message),
+            actions=[TextButton("OK", on_click=lambda e: page.close(dialog))]
+        )
+        page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+    import_btn.on_click = lambda e: import_picker.pick_files(
+        dialog_title="Import transactions",
+        allowed_extensions=["csv", "ofx", "qfx"],
+    )
+
     # Event handler for generating report
     def on_generate_report(e):
 
@@ -208,12 +232,9 @@ def main(page: Page):
             page.update()
             return
 
-        filtered_txns = filter_transactions(month, year)
-        total_income = sum(txn["amount"] for txn in filtered_txns if txn["type"] == "Income")
-        total_expenses = sum(txn["amount"] for txn in filtered_txns if txn["type"] == "Expense")
-        balance = total_income - total_expenses
-
-        chart_image = generate_pie_chart(filtered_txns)  # Added handling for no transactions
+        summary = monthly_summary(transactions, month, year)
+        total_income, total_expenses = summary.income, summary.expenses
+        balance = summary.balance
 
         report_controls = [
             Text(f"Report for {month}/{year}", style=TextThemeStyle.HEADLINE_MEDIUM),
@@ -222,10 +243,12 @@ def main(page: Page):
             Text(f"Balance: ${balance:.2f}"),
         ]
 
-        if chart_image:  # Added condition to check if chart_image exists
+        if summary.categories:  # Added handling for no transactions
+            # The chart renders in the background; show a spinner until it is ready
+            chart_slot = Container(ProgressRing(), width=300, height=300, alignment=Alignment(0, 0))
             report_controls.extend([
                 Text("Expense Breakdown:"),
-                Image(src_base64=chart_image, width=300, height=300),  # Changed to src_base64
+                chart_slot,
             ])
         else:
             report_controls.append(Text("No transactions to display in the pie chart."))
@@ -233,6 +256,13 @@ def main(page: Page):
         report_output.controls = report_controls
         page.update()
 
+        if summary.categories:
+            def show_chart(future):
+                chart_slot.content = Image(src_base64=future.result().base64, width=300, height=300)
+                page.update()
+
+            chart_service.pie_chart(summary.categories).add_done_callback(show_chart)
+
     generate_report_btn.on_click = on_generate_report
 
     def save_pdf_report(e):
@@ -240,35 +270,12 @@ def main(page: Page):
         report_month = report_month_field.value
         report_year = report_year_field.value
 
-        pdf_name = f"{report_month}-{report_year}.pdf"
-        c = canvas.Canvas(pdf_name, pagesize=pagesizes.A4)
-        width, height = pagesizes.A4
-
-        filtered_txns = filter_transactions(int(report_month), int(report_year))
-        total_income = sum(txn["amount"] for txn in filtered_txns if txn["type"] == "Income")
-        total_expenses = sum(txn["amount"] for txn in filtered_txns if txn["type"] == "Expense")
-        balance = total_income - total_expenses
-
-        # Adding text to the PDF
-        c.drawString(150, height - 90, f"Report for {report_month}/{report_year}")
-        c.drawString(100, height - 120, f"Total Income: ${total_income:.2f}")
-        c.drawString(100, height - 140, f"Total Expenses: ${total_expenses:.2f}")
-        c.drawString(100, height - 160, f"Balance: ${balance:.2f}")
+        pdf_name = report_filename(report_month, report_year)
+        summary = monthly_summary(transactions, int(report_month), int(report_year))
 
-        # Generate the chart if there are transactions
-        chart_image = generate_pie_chart(filtered_txns)
-        if chart_image:
-            # Decode the base64 image and save it as a temporary file
-            chart_img_path = "chart_image.png"
-            with open(chart_img_path, "wb") as img_file:
-                img_file.write(base64.b64decode(chart_image))
-
-            # Add the image to the PDF
-            c.drawImage(chart_img_path, 100, height - 500, width=300, height=300)
-
-        # Save the PDF
-        c.showPage()
-        c.save()
+        # Use the chart if there are transactions, straight from memory (usually already cached by the view)
+        chart_png = chart_service.pie_chart(summary.categories).result().png if summary.categories else None
+        build_pdf_report(pdf_name, report_month, report_year, summary.income, summary.expenses, chart_png)
 
         # Notify user about the saved report
         dialog = AlertDialog(
@@ -280,6 +287,35 @@ def main(page: Page):
         dialog.open = True
         page.update()
 
+    def export_year_reports(e):
+        try:
+            year = int(report_year_field.value)
+        except ValueError:
+            return
+
+        export_year_btn.disabled = True
+        page.update()
+        try:
+            paths = export_reports(transactions, month_range(1, year, 12, year), output_dir=f"reports-{year}")
+            message = f"Saved {len(paths)} monthly reports to reports-{year}" if paths else f"No transactions in {year}."
+        finally:
+            export_year_btn.disabled = False
+
+        dialog = AlertDialog(
+            title=Text("Reports Exported"),
+            content=Text(message),
+            actions=[TextButton("OK", on_click=lambda e: page.close(dialog))]
+        )
+        page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+    export_year_btn = ElevatedButton(
+        text="Export Year",
+        icon=icons.PICTURE_AS_PDF,
+        on_click=export_year_reports,
+    )
+
     def view_report_output(e):
         dialog = AlertDialog(
             modal=True,
@@ -295,6 +331,43 @@ def main(page: Page):
         dialog.open = True
         page.update()
 
+    def view_trends(e):
+        try:
+            year = int(report_year_field.value)
+        except ValueError:
+            return
+
+        trends = compute_trends(transactions, year)
+        years, income, expenses = trends.yearly_totals()
+        summary_lines = [
+            Text(f"{y}: income ${i:.2f}, expenses ${x:.2f}")
+            for y, i, x in zip(years.tolist(), income.tolist(), expenses.tolist())
+        ]
+
+        # Each chart renders in the background and replaces its spinner when ready
+        chart_slots = {}
+        for name in TREND_CHARTS:
+            chart_slots[name] = Container(ProgressRing(), width=560, height=280, alignment=Alignment(0, 0))
+
+        dialog = AlertDialog(
+            title=Text(f"Trends {trends.first_year}-{trends.last_year}"),
+            content=Column(summary_lines + list(chart_slots.values()), scroll=ScrollMode.AUTO, width=600),
+            actions=[TextButton("OK", on_click=lambda e: page.close(dialog), icon=icons.DONE)],
+            actions_alignment=MainAxisAlignment.CENTER,
+        )
+        page.overlay.append(dialog)
+        dialog.open = True
+        page.update()
+
+        def show_chart(slot):
+            def callback(future):
+                slot.content = Image(src_base64=future.result().base64, width=560, height=280)
+                page.update()
+            return callback
+
+        for name, future in chart_service.trend_charts(trends).items():
+            future.add_done_callback(show_chart(chart_slots[name]))
+
     def toggle_night_mode(e):
         if page.theme_mode == ThemeMode.LIGHT:
             page.theme_mode = ThemeMode.DARK
@@ -306,6 +379,9 @@ def main(page: Page):
             e.control.icon = icons.BRIGHTNESS_3
         page.update()
 
+    # Show the first page of any transactions already in the ledger
+    txn_table.refresh()
+
     # Assemble the UI
     page.add(
         Container(
@@ -335,6 +411,8 @@ def main(page: Page):
                                         amount_field,
                                         date_field,
                                         add_btn,
+                                        import_btn,
+                                        import_progress,
                                     ],
                                     alignment=MainAxisAlignment.CENTER
                                 ),
@@ -356,7 +434,13 @@ def main(page: Page):
                                             icon=icons.LENS_ROUNDED,
                                             icon_color=colors.RED,
                                             on_click=lambda e: [on_generate_report(e), view_report_output(e)],
-                                        )
+                                        ),
+                                        export_year_btn,
+                                        ElevatedButton(
+                                            text="View Trends",
+                                            icon=icons.SHOW_CHART,
+                                            on_click=view_trends,
+                                        ),
                                     ],
                                     alignment=MainAxisAlignment.CENTER
                                 ),
@@ -368,7 +452,7 @@ def main(page: Page):
                     Container(border=border.only(BorderSide(0),BorderSide(0),BorderSide(1),BorderSide(0),)),
                     Container(Column([
                                 Container(Text("Transactions", style=TextThemeStyle.HEADLINE_MEDIUM), alignment=Alignment(0,0)),
-                                Container(txn_table, alignment=Alignment(0,-1))
+                                Container(txn_table.view, alignment=Alignment(0,-1))
                             ]),
                         expand=True,
                     ),
@@ -0,0 +1,78 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib import pagesizes
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from charts import render_pie_chart
+
+
+def report_filename(month, year):
+    return f"{month}-{year}.pdf"
+
+
+def month_range(start_month, start_year, end_month, end_year):
+    """Yields (month, year) pairs from the start month to the end month, inclusive."""
+    month, year = start_month, start_year
+    while (year, month) <= (end_year, end_month):
+        yield month, year
+        month, year = (1, year + 1) if month == 12 else (month + 1, year)
+
+
+def build_pdf_report(output, month, year, income, expenses, chart_png=None):
+    """Writes a monthly report to `output` (a path or a binary file object).
+
+    The chart is handed to reportlab straight from memory, so no temporary
+    image file is written.
+    """
+    c = canvas.Canvas(output, pagesize=pagesizes.A4)
+    width, height = pagesizes.A4
+
+    # Adding text to the PDF
+    c.drawString(150, height - 90, f"Report for {month}/{year}")
+    c.drawString(100, height - 120, f"Total Income: ${income:.2f}")
+    c.drawString(100, height - 140, f"Total Expenses: ${expenses:.2f}")
+    c.drawString(100, height - 160, f"Balance: ${income - expenses:.2f}")
+
+    # Add the chart if there are transactions
+    if chart_png:
+        c.drawImage(ImageReader(io.BytesIO(chart_png)), 100, height - 500, width=300, height=300)
+
+    # Save the PDF
+    c.showPage()
+    c.save()
+
+
+def _export_month(job):
+    # Runs in a worker process: draw the chart and write one PDF
+    path, month, year, income, expenses, categories = job
+    chart_png = render_pie_chart(categories) if categories else None
+    build_pdf_report(path, month, year, income, expenses, chart_png)
+    return path
+
+
+def export_reports(store, periods, output_dir=".", max_workers=None, skip_empty=True):
+    """Renders the monthly reports of `periods` ((month, year) pairs) in parallel.
+
+    Totals come from the store's cached month summaries; chart drawing and
+    PDF writing, the expensive parts, run in a process pool. Returns the
+    paths of the written files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = []
+    for month, year in periods:
+        summary = store.monthly_summary(month, year)
+        if skip_empty and not summary.categories:
+            continue
+        path = os.path.join(output_dir, report_filename(month, year))
+        jobs.append((path, month, year, summary.income, summary.expenses, dict(summary.categories)))
+    if not jobs:
+        return []
+
+    # Spawned workers do not inherit the UI's threads or open database handles
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        return list(executor.map(_export_month, jobs))
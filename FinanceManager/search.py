@@ -0,0 +1,67 @@
+import bisect
+import re
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Splits text into lowercase word tokens."""
+    return [token.casefold() for token in TOKEN.findall(text)]
+
+
+def fts_query(text):
+    """Turns search text into an SQLite FTS5 query: every word is a prefix and all must match."""
+    return " ".join(f'"{token}"*' for token in tokenize(text))
+
+
+class TokenIndex:
+    """Inverted index from word tokens to document ids.
+
+    Tokens are also kept in a sorted list, so a prefix lookup is a binary
+    search followed by a walk over the matching tokens only.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._tokens = []
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def add(self, doc_id, text):
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = set()
+                bisect.insort(self._tokens, token)
+            postings.add(doc_id)
+
+    def remove(self, doc_id, text):
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.discard(doc_id)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def prefix(self, prefix):
+        """Returns the ids of documents containing a token that starts with `prefix`."""
+        ids = set()
+        for i in range(bisect.bisect_left(self._tokens, prefix), len(self._tokens)):
+            token = self._tokens[i]
+            if not token.startswith(prefix):
+                break
+            ids |= self._postings[token]
+        return ids
+
+    def search(self, text):
+        """Returns the ids of documents matching every word of `text` as a prefix."""
+        result = None
+        for term in tokenize(text):
+            ids = self.prefix(term)
+            result = ids if result is None else result & ids
+            if not result:
+                return set()
+        return result or set()
@@ -0,0 +1,166 @@
+from flet import Text, Row, Column, DataTable, DataColumn, DataRow, DataCell, TextField, IconButton
+from flet_core import icons, colors, MainAxisAlignment, CrossAxisAlignment
+
+from ledger import parse_date
+
+PAGE_SIZE = 25
+
+# DataTable column index -> store sort key (the Delete column is not sortable)
+COLUMN_SORT_KEYS = ("type", "description", "amount", "date")
+
+
+class TransactionTable:
+    """Paginated view over a transaction store.
+
+    Only the rows of the visible page are turned into controls. Sorting,
+    search and filtering are delegated to `store.query`, and refreshing reuses the
+    DataRow of every transaction that is still on screen, so adding or
+    deleting a transaction only sends the rows that actually changed.
+    """
+
+    def __init__(self, store, on_delete, page_size=PAGE_SIZE):
+        self.store = store
+        self.on_delete = on_delete
+        self.page_size = page_size
+        self.offset = 0
+        self.total = 0
+        self.sort_by = "id"
+        self.descending = True  # Newest transactions first
+        self.filters = {}
+        self._rows = {}
+
+        self.table = DataTable(
+            columns=[
+                DataColumn(Text("Type"), on_sort=self._on_sort),
+                DataColumn(Text("Description"), on_sort=self._on_sort),
+                DataColumn(Text("Amount"), numeric=True, on_sort=self._on_sort),
+                DataColumn(Text("Date"), on_sort=self._on_sort),
+                DataColumn(Text("Delete")),
+            ],
+            rows=[],
+        )
+        self.search_field = TextField(
+            label="Search descriptions", width=300, dense=True, prefix_icon=icons.SEARCH,
+            on_submit=self._on_filter,
+        )
+        self.start_field = TextField(label="From (YYYY-MM-DD)", width=150, dense=True)
+        self.end_field = TextField(label="To (YYYY-MM-DD)", width=150, dense=True)
+        self.min_field = TextField(label="Min $", width=90, dense=True)
+        self.max_field = TextField(label="Max $", width=90, dense=True)
+        self.page_text = Text()
+        self.prev_btn = IconButton(icon=icons.CHEVRON_LEFT, on_click=lambda e: self.go_to(self.offset - self.page_size))
+        self.next_btn = IconButton(icon=icons.CHEVRON_RIGHT, on_click=lambda e: self.go_to(self.offset + self.page_size))
+
+        self.view = Column(
+            [
+                Row(
+                    [
+                        self.search_field,
+                        IconButton(icon=icons.FILTER_ALT, tooltip="Filter", on_click=self._on_filter),
+                        IconButton(icon=icons.FILTER_ALT_OFF, tooltip="Clear filter", on_click=self._on_clear_filter),
+                    ],
+                    alignment=MainAxisAlignment.CENTER,
+                ),
+                Row(
+                    [self.start_field, self.end_field, self.min_field, self.max_field],
+                    alignment=MainAxisAlignment.CENTER,
+                ),
+                self.table,
+                Row([self.prev_btn, self.page_text, self.next_btn], alignment=MainAxisAlignment.CENTER),
+            ],
+            horizontal_alignment=CrossAxisAlignment.CENTER,
+        )
+
+    def _build_row(self, txn_id, txn):
+        return DataRow(cells=[
+            DataCell(Text(txn.type)),
+            DataCell(Text(txn.description)),
+            DataCell(Text(f"${txn.amount:.2f}")),
+            DataCell(Text(txn.date)),
+            DataCell(IconButton(  # Add a delete button
+                icon=icons.CLOSE,
+                icon_color=colors.RED,
+                on_click=lambda e, i=txn_id: self.on_delete(i)
+            ))
+        ])
+
+    def refresh(self):
+        """Re-reads the current page from the store and patches the table rows."""
+        self.total, window = self.store.query(
+            offset=self.offset,
+            limit=self.page_size,
+            sort_by=self.sort_by,
+            descending=self.descending,
+            **self.filters,
+        )
+        if not window and self.offset > 0:
+            # The last page became empty, e.g. after deleting its only row
+            self.offset = max(0, (self.total - 1) // self.page_size * self.page_size)
+            return self.refresh()
+
+        rows = {}
+        for txn_id, txn in window:
+            rows[txn_id] = self._rows.get(txn_id) or self._build_row(txn_id, txn)
+        self._rows = rows
+        self.table.rows = list(rows.values())
+
+        first = self.offset + 1 if self.total else 0
+        last = min(self.offset + self.page_size, self.total)
+        self.page_text.value = f"{first}-{last} of {self.total}"
+        self.prev_btn.disabled = self.offset == 0
+        self.next_btn.disabled = last >= self.total
+
+    def _update(self):
+        self.refresh()
+        if self.view.page:
+            self.view.update()
+
+    def go_to(self, offset):
+        self.offset = max(0, offset)
+        self._update()
+
+    def _on_sort(self, e):
+        self.sort_by = COLUMN_SORT_KEYS[e.column_index]
+        self.descending = not e.ascending
+        self.table.sort_column_index = e.column_index
+        self.table.sort_ascending = e.ascending
+        self.offset = 0
+        self._update()
+
+    def _filter_fields(self):
+        return (self.start_field, self.end_field, self.min_field, self.max_field)
+
+    def _on_filter(self, e):
+        filters = {}
+        text = self.search_field.value.strip()
+        if text:
+            filters["text"] = text
+        for field, key, parse in (
+            (self.start_field, "start_date", parse_date),
+            (self.end_field, "end_date", parse_date),
+            (self.min_field, "min_amount", float),
+            (self.max_field, "max_amount", float),
+        ):
+            field.error_text = None
+            if not field.value.strip():
+                continue
+            try:
+                filters[key] = parse(field.value.strip())
+            except ValueError:
+                field.error_text = "Invalid"
+        if any(field.error_text for field in self._filter_fields()):
+            self.view.update()
+            return
+
+        self.filters = filters
+        self.offset = 0
+        self._update()
+
+    def _on_clear_filter(self, e):
+        self.search_field.value = ""
+        for field in self._filter_fields():
+            field.value = ""
+            field.error_text = None
+        self.filters = {}
+        self.offset = 0
+        self._update()